@@ -10,13 +10,16 @@
 # Provide instructions for how to run your application. Preferably in a README.md
 #at the root of your project.
 
-#value of strike frame is 10 + next 2 throws
-#value of spare frame is 10 + next throw
-#value of open frame is face value
-
-import argparse
 import sys
-import re
+
+#the scoring core lives in tenpin_core, which is cheap to import on its own;
+#it is re-exported here so existing "import tenpin" callers keep working
+from tenpin_core import (parse_frame_score, legal_frames,
+                         validate_frame_score, validate_frame_throws,
+                         next_throws_value,
+                         calculate_current_score, frame_pins, FrameScorer,
+                         pins_notation, Frame, Game, score_slots, CacheInfo,
+                         FrameWindowCache)
 
 def ask_num_players(input_function = raw_input):
     """ Queries user for number of players, enforcing that it must
@@ -54,185 +57,44 @@ def collect_player_names(num_players,input_function = raw_input):
         player_names.append(input_function("Enter the name of "
                                         + "player number %d.\n"%i))
     return player_names
-    
-def validate_frame_score(frame, tenth):
-    """ Uses simple length checking and regular expressions 
-        to validate an entered frame score in string form
-        
-        frame: a string to validate
-        tenth: a boolean value, True if this is the 10th frame 
-            and False otherwise
 
-        Expected formats on non-thenth frames are "X", 
-            or strings which fit the regular expression 
-            "^([0-9]),([0-9\/])$"
-            where the sum of digits is never more than 10
-            
-        Expected formats on the tenth frame are either "X,X,X", 
-            ["X","{int<=9}","/"], ["X","{int}","{int}"], "{int},/,X", "{int},/,{int}", "{int},/,{int}",
-                or "{int},{int}" where no int is >9 and where the sum of ints in the last 
-                is never more than 10
-            
-        return value: boolean True if the score is valid 
-                    and boolean False otherwise
+
+def format_frame_report(frame_number, player_name, score, bounds=None):
+    """ Builds the lines printed after a player completes a frame
+
+        frame_number: the frame just completed, from 1 to 10
+        player_name: the name of the player who completed it
+        score: their current score, or None if it is unavailable
+        bounds: optionally, a ScoreBounds from tenpin_projection giving
+            the lowest and highest final scores they can still reach
+
+        return value: a string of one or more lines, without a
+            trailing newline
     """
-    
-    #int value of True is 1; 
-    #1 is min length of normal frames and 3 is min length for tenth
-    #this means 3 is max length for normal frames and
-    #5 is max length for tenth frame;
-    
-    min_length = 1
-    max_length = 3
-    if tenth:
-        min_length+=2
-        max_length+=2
-    length=len(frame)
-    if (length < min_length) or (length > max_length):
-        return False
-    #validation logic for normal frames
-    if not tenth:
-        if length == 1:
-            return frame == 'X'#the only valid 1 character frame is 'X'
-        try:
-            nexpression = "^([0-9]),([0-9\/])$"
-            m = re.search(nexpression, frame)
-            return (m.groups()[1]=="/" or (int(m.groups()[0]) + int(m.groups()[1])) < 10)
-        except (AttributeError, ValueError) as e:#the regex didn't match
-            return False
-  
-    #validation logic for tenth frames
+    if frame_number == 10:
+        return ("Completed frame 10 for player '%s'\nFinal score: %s"
+                %(player_name, score))
+    lines = ["Completed frame %d for player '%s'."%(frame_number, player_name)]
+    if score is not None:
+        lines.append("Their current score is %d"%score)
     else:
-        if length == 3:
-            try: #the only valid length 3 frame is 2 digits
-                 #which sum < 10
-                texpression = "^([0-9]),([0-9])$"
-                m = re.search(texpression, frame)
-                return ((int(m.groups()[0]) + int(m.groups()[1])) < 10)
-            except (AttributeError, ValueError) as e:#the regex didn't match
-                return False
-        else:
-            #"X,X,X", "X,{int<=9},/", "X,{int},{int}", "{int},/,X", "{int},/,{int}",
-            try:
-                texpression = "^([0-9]),(\/),([0-9X])$|^(X),([0-9]),([0-9\/])$|^(X),(X),([0-9X])$"
-                m = re.search(texpression, frame)
-                if m.groups()[0]:#first pattern, always valid
-                    return True
-                if m.groups()[3] is not None:#second pattern (starting X)
-                    if m.groups()[5] == '/':#always valid for final spare
-                        return True
-                    else:#otherwise only valid if digits sum < 10
-                        return ((int(m.groups()[4]) + int(m.groups()[5])) < 10)
-                if m.groups()[6]:#Third pattern, always valid
-                    return True
-                    
-                
-            except (AttributeError, ValueError) as e:#the regex didn't match
-                return False
-    return False #should be unreachable, as long as the logic is good
+        lines.append("(Their current score is unavailable)")
+    if bounds is not None:
+        lines.append("Their final score can be from %d to %d"
+                     %(bounds.minimum, bounds.maximum))
+    return "\n".join(lines)
 
 
-def next_throws_value(frames, f, n):
-    """ Returns the total pin value of the next n throws after 
-            frame f in frames. When called with f=9 (the 10th frame),
-            will instead return the value of the third throw of frame 10
-            (if n==1) or the second + third throw of frame 10 (if n==2)
-        
-        frames: a list of lists of strings;
-            each inner list will be
-            either ["X"] 
-            or ["{int 0<=a<=9}","/"] 
-            or ["{int a}","{int b}"] where 0<=a+b<=9
-        
-        f: in index for f; will start counting throw value _after_ frame f
-            (so this is useful for calculating the value of a spare or strike
-            in frame f)
-            
-        n: integer number of throws to tally value for after frame f;
-            will be either 1 or 2 in practice (for spares or strikes respectively)
-            
-        return value: an integer value for the next 1 or 2 throws after frame f;
-            a strike has value 10, and a spare has value 10 when considered
-            as two throws
-    """
-    counted = 0
-    total = 0
-    #if we are on a special three-throw last frame
-    if f == 9 and len(frames[9]) == 3:
-        if n == 1:#check last throw to fill out a spare
-            if frames[9][2]=='X':
-                return 10
-            else:
-                return int(frames[9][2])
-        else:#check last 2 frames to fill out a strike
-            if frames[9][2]=='/':#last 2 frame spare
-                return 10
-            elif frames[9][2]=='X':#last 2 frame double strike
-                return 20
-            else:
-                return int(frames[9][1]) + int(frames[9][2])
-        return total
-    while counted < n:
-        for throw in frames[f+1]:
-            if throw == 'X':#in case of strike, one throw was worth 10
-                total += 10
-                counted +=1
-            elif throw == '/':#in case of spare
-                rem = total % 10#we fill out the current 10 pins
-                total -= rem
-                total += 10
-                counted +=1
-            else: #a numerical throw
-                total += int(throw)
-                counted +=1
-            if counted >=n:
-                break
-        if counted < n:
-            f += 1
-    return total
-def calculate_current_score(frames):
-    """ Returns a current score for the given frames.
-        Can be called for finished or unfinished sheets.
-        
-        frames: a list of lists of strings;
-            each inner list will be
-            either ["X"] 
-            or ["{int 0<=a<=9}","/"] 
-            or ["{int a}","{int b}"] where 0<=a+b<=9
-            
-        return value: null if the number can't currently be calculated 
-        (if the value of a strike or spare is still being determined);
-        otherwise, the current full value can be determined and displayed.
-        
-    """
-    total = 0
-    
-    for f,frame in enumerate(frames):
-        frame_total=0
-        if len(frame)==2:#spare or numerical
-            if frame[1]!='/':#if this isn't a spare
-                frame_total = int(frame[0]) + int(frame[1])
-            else: #if this is a spare
-                try:
-                    frame_total += (10 + next_throws_value(frames,f,1))
-                except IndexError:
-                    return None
-        elif len(frame)==1:#a single strike
-            try:
-                frame_total += (10 + next_throws_value(frames,f,2))
-            except IndexError:
-                return None
-        else: #a length 3 final frame
-            if frame[0] == 'X': #started with strike
-                frame_total += (10 + next_throws_value(frames,f,2))
-            else: #started with spare
-                frame_total += (10 + next_throws_value(frames,f,1))
-        total += frame_total
-    return total
-    
+#the id the interactive game is journaled under
+JOURNAL_GAME_ID = 'interactive'
 
-#begin standalone execution
-if __name__ == '__main__':
+
+def main():
+    """ Runs the application as selected on the command line; argparse
+            and the modules behind each mode are only imported here,
+            and only for the mode that runs
+    """
+    import argparse
     parser = argparse.ArgumentParser()
 
     parser.add_argument('--test', action='store_const',
@@ -240,231 +102,162 @@ if __name__ == '__main__':
         default=False,
         help='run tests'
         )
+    parser.add_argument('--bulk', metavar='FILE',
+        default=None,
+        help="score games non-interactively, one 'name|frame|...|frame' "
+            + "line per game, from FILE ('-' for stdin)"
+        )
+    parser.add_argument('--serve', metavar='ADDRESS',
+        default=None,
+        help="serve many lanes at once on ADDRESS, given as 'host:port' "
+            + "or a Unix socket path"
+        )
+    parser.add_argument('--journal', metavar='FILE',
+        default=None,
+        help='journal games in progress to FILE, and resume them from it '
+            + 'after a crash (interactive and --serve modes)'
+        )
+    parser.add_argument('--profile', action='store_const',
+        const=True,
+        default=False,
+        help='time each stage of scoring and print a summary on exit or '
+            + 'SIGUSR1 (also enabled by setting TENPIN_PROFILE=1)'
+        )
+    parser.add_argument('--workers', type=int,
+        default=1,
+        help='number of processes to score --bulk input with (default 1)'
+        )
+    parser.add_argument('--chunk-size', type=int,
+        default=1000,
+        help='lines of --bulk input sent to a worker at a time (default 1000)'
+        )
     
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    import os
+    if args.profile or os.environ.get('TENPIN_PROFILE', '0') not in ('','0'):
+        #worker processes keep their timings to themselves
+        if args.bulk is not None and args.workers > 1:
+            parser.error("profiling only times this process, so it can't "
+                         + "be combined with --workers above 1")
+        import tenpin_profile
+        tenpin_profile.enable(sys.modules[__name__])
     
     #Test execution workflow
     if args.test:
-        del sys.argv[1:]
-        import unittest
-        class TenpinUnitTests(unittest.TestCase):
-                """ Tests general behavior of the functions of tenpin.py """
-                
-                def setUp(self):
-                    #Placeholder setup code
-                    pass
-                    
-                #most of the unit tests take advantage of the input_function argument to take input
-                #from a custom function instead of raw_input for testing purposes
-                def test_ask_num_players_valid(self):
-                    """ Tests that a valid integer num players can be entered
-                    """
-                    valid_pnum = ask_num_players(lambda _: '3')
-                    self.assertEqual(valid_pnum, 3)
-                    
-                def test_ask_num_players_invalid(self):
-                    """ Tests that invalid player number is rejected until
-                        an acceptable entry is received
-                    """
-                    def two_invalid_then_valid_numplayers_input(_):
-                        two_invalid_then_valid_numplayers_input.c += 1
-                        returns = ['-','-3','4']
-                        return returns[
-                                two_invalid_then_valid_numplayers_input.c]
-                    two_invalid_then_valid_numplayers_input.c = -1
-                    
-                    eventually_valid_pnum = ask_num_players(
-                                    two_invalid_then_valid_numplayers_input)
-                    self.assertEqual(eventually_valid_pnum, 4)
-                
-                def test_collect_player_names(self):
-                    """ Tests that several player names are properly recorded
-                    """
-                    def three_playernames_input(_):
-                        three_playernames_input.c += 1
-                        returns = ['frumulo','','-=-=--=-=-==']
-                        return returns[
-                                three_playernames_input.c]
-                    three_playernames_input.c = -1
-                    
-                    three_player_names = collect_player_names(3,
-                                                three_playernames_input)
-                    self.assertEqual(len(three_player_names), 3)
-                    self.assertEqual(three_player_names, ['frumulo',
-                                                    '','-=-=--=-=-=='])
-                
-                def test_validate_frame_score_normal(self):
-                    """ Tests frame score validation function
-                        behaves appropriately on normal (non-
-                        tenth) frames
-                    """
-                    nframes_good = ["1,2","0,0","0,9","1,0","5,/","X","0,/"]
-                    self.assertEqual([validate_frame_score(frame,False) 
-                                                for frame in nframes_good],
-                                                [True for _ in nframes_good])
-                    nframes_bad = [",2","X,X","","7,8","/,/"]
-                    self.assertEqual([validate_frame_score(frame,False) 
-                                                for frame in nframes_bad],
-                                                [False for _ in nframes_bad])
-                    
-                    
-                def test_validate_frame_score_tenth(self):
-                    """ Tests frame score validation function
-                        behaves appropriately on tenth frames
-                    """    
-                    tframes_good = ["2,3","2,/,X","2,/,7","X,X,X",
-                                                    "X,X,7","X,7,/"]
-                    self.assertEqual([validate_frame_score(frame,True) 
-                                                for frame in tframes_good],
-                                                [True for _ in tframes_good])
-                    tframes_bad = [",2","X,X","","7,8","/,/",
-                                    "X,/,X","2,/,/","/,X,X","2,X,7","X,7,9"]
-                    self.assertEqual([validate_frame_score(frame,True) 
-                                                for frame in tframes_bad],
-                                                [False for _ in tframes_bad])
-                
-                def test_next_throws_value_short(self):
-                    """ Tests that next_throws_value can find the
-                        value of the next 1 and 2 throws outside of the 
-                        10th frame
-                    """
-                    easy_frames = [['1','2'],['3','4'],['5','/']]
-                    self.assertEqual(next_throws_value(easy_frames,0,1),3)
-                    self.assertEqual(next_throws_value(easy_frames,1,2),10)
-                        
-                def test_next_throws_value_end(self):
-                    """ Tests that next_throws_value can find the
-                        value of the next 1 and 2 throws within the 10th frame
-                    """
-                    ten_frames1 = [['1','2'],['3','4'],['5','/'],['1','2'],
-                                   ['3','4'],['5','/'],['1','2'],['3','4'],
-                                   ['5','/'],['3','/','X']]
-                    ten_frames2 = [['1','2'],['3','4'],['5','/'],['1','2'],
-                                   ['3','4'],['5','/'],['1','2'],['3','4'],
-                                   ['5','/'],['X','3','/']]
-                    ten_frames3 = [['1','2'],['3','4'],['5','/'],['1','2'],
-                                   ['3','4'],['5','/'],['1','2'],['3','4'],
-                                   ['5','/'],['3','/','3']]
-                    ten_frames4 = [['1','2'],['3','4'],['5','/'],['1','2'],
-                                   ['3','4'],['5','/'],['1','2'],['3','4'],
-                                   ['5','/'],['X','2','5']]
-                    self.assertEqual(next_throws_value(ten_frames1,9,1),10)
-                    self.assertEqual(next_throws_value(ten_frames2,9,2),10)
-                    self.assertEqual(next_throws_value(ten_frames3,9,1),3)
-                    self.assertEqual(next_throws_value(ten_frames4,9,2),7)
-                    
-                def test_calculate_current_score_inprogress(self):
-                    """ Tests that scores can be reported when possible in
-                        a game in progress, and not reported when currently 
-                        indeterminate
-                    """
-                    easy_frames = [['1','2'],['3','4'],['5','0']]
-                    strike_good_frames = [['X'],['3','6'],['5','0']]
-                    strike_bad_frames1 = [['1','2'],['3','4'],['X']]
-                    strike_bad_frames2 = [['1','2'],['X'],['X']]
-                    spare_good_frames = [['1','2'],['3','/'],['5','0']]
-                    spare_bad_frames =  [['1','2'],['3','4'],['5','/']]
-                    strike_spare_frames =  [['X'],['7','/'],['3','0']]
-                    spare_strike_frames =  [['7','/'],['X'],['3','0'],['3','4']]
-                    double_strike_frames =  [['X'],['X'],['3','0'],['3','4']]
-                    double_spare_frames =  [['7','/'],['2','/'],['3','0'],['3','4']]
-                    
-                    self.assertEqual(calculate_current_score(easy_frames),15)
-                    self.assertEqual(calculate_current_score(strike_good_frames),33)
-                    self.assertEqual(calculate_current_score(strike_bad_frames1),None)
-                    self.assertEqual(calculate_current_score(strike_bad_frames2),None)
-                    self.assertEqual(calculate_current_score(spare_good_frames),23)
-                    self.assertEqual(calculate_current_score(spare_bad_frames),None)
-                    self.assertEqual(calculate_current_score(strike_spare_frames),36)
-                    self.assertEqual(calculate_current_score(spare_strike_frames),43)
-                    self.assertEqual(calculate_current_score(double_strike_frames),46)
-                    self.assertEqual(calculate_current_score(double_spare_frames),35)
-                    
-                def test_calculate_current_score_final(self):
-                    """ Tests that final scores are reported correctly
-                    """
-                    gutter_frames = [['0','0'],['0','0'],['0','0'],['0','0'],
-                                   ['0','0'],['0','0'],['0','0'],['0','0'],
-                                   ['0','0'],['0','0']]
-                    perfect_frames = [['X'],['X'],['X'],['X'],
-                                   ['X'],['X'],['X'],['X'],
-                                   ['X'],['X','X','X']]
-                    alternate_frames = [['X'],['0','0'],['X'],['0','/'],
-                                   ['X'],['0','0'],['X'],['0','/'],
-                                   ['X'],['0','/','0']]
-                    ten_frames1 = [['1','2'],['3','4'],['5','/'],['1','2'],
-                                   ['3','4'],['5','/'],['1','2'],['3','4'],
-                                   ['5','/'],['3','/','X']]
-                    ten_frames2 = [['1','2'],['3','4'],['5','/'],['1','2'],
-                                   ['3','4'],['5','/'],['1','2'],['3','4'],
-                                   ['5','/'],['X','3','/']]
-                    ten_frames3 = [['1','2'],['3','4'],['5','/'],['1','2'],
-                                   ['3','4'],['5','/'],['1','2'],['3','4'],
-                                   ['5','/'],['3','/','3']]
-                    ten_frames4 = [['1','2'],['3','4'],['5','/'],['1','2'],
-                                   ['3','4'],['5','/'],['1','2'],['3','4'],
-                                   ['5','/'],['X','2','5']]
-                    ten_frames5 = [['1','2'],['3','4'],['5','/'],['1','2'],
-                                   ['3','4'],['5','/'],['1','2'],['3','4'],
-                                   ['5','/'],['2','5']]
-                    self.assertEqual(calculate_current_score(gutter_frames),0)
-                    self.assertEqual(calculate_current_score(perfect_frames),300)
-                    self.assertEqual(calculate_current_score(alternate_frames),130)
-                    self.assertEqual(calculate_current_score(ten_frames1),85)
-                    self.assertEqual(calculate_current_score(ten_frames2),92)
-                    self.assertEqual(calculate_current_score(ten_frames3),78)
-                    self.assertEqual(calculate_current_score(ten_frames4),89)
-                    self.assertEqual(calculate_current_score(ten_frames5),71)
+        import tenpin_tests
+        tenpin_tests.main()
+
+    #Bulk scoring workflow
+    elif args.bulk is not None:
+        if args.workers > 1:
+            import tenpin_parallel
+            def run(infile, outfile, errfile):
+                return tenpin_parallel.run_parallel(infile, outfile, errfile,
+                                            args.workers, args.chunk_size)
+        else:
+            import tenpin_bulk
+            run = tenpin_bulk.run_bulk
+        if args.bulk == '-':
+            scored, rejected = run(sys.stdin, sys.stdout, sys.stderr)
+        else:
+            with open(args.bulk) as infile:
+                scored, rejected = run(infile, sys.stdout, sys.stderr)
+        sys.exit(1 if rejected else 0)
+
+    #Lane server workflow
+    elif args.serve is not None:
+        import tenpin_server
+        try:
+            tenpin_server.serve(args.serve, args.journal)
+        except ValueError as e:#refused to replace a file that isn't a socket
+            parser.error(str(e))
 
-        unittest.main()
-                    
-                    
     #Normal execution workflow
     else:
-        num_players = ask_num_players()
-        player_names = collect_player_names(num_players)
-        score_sheet = [[] for names in player_names]
-        for frame_index in range(9):#we loop the first 9 frames
+        import tenpin_game
+        import tenpin_projection
+        journal = None
+        game = None
+        if args.journal is not None:
+            import tenpin_journal
+            journal = tenpin_journal.Journal(args.journal)
+            game = journal.games.get(JOURNAL_GAME_ID)
+        if game is not None:#pick up where the last run left off
+            player_names = game.player_names
+            num_players = len(player_names)
+            recovered = game.score_sheet
+            print("Resuming the game in progress for %s."
+                  %', '.join("'%s'"%name for name in player_names))
+        else:
+            num_players = ask_num_players()
+            player_names = collect_player_names(num_players)
+            recovered = [[] for names in player_names]
+            if journal is not None:
+                try:
+                    journal.new_game(JOURNAL_GAME_ID, player_names)
+                except ValueError as e:#the game can still be played
+                    print("Not journaling this game: %s"%e)
+                    journal.close()
+                    journal = None
+        #the shared score sheet keeps a running score for each player,
+        #so each frame costs the same to score
+        score_sheet = tenpin_game.SharedScoreSheet(player_names)
+        for player_index, frames in enumerate(recovered):
+            for frame in frames:
+                score_sheet.submit(player_index, frame)
+
+        def report_frame(player_index, frame_number, scorer):
+            #score is None if the full value of a strike or spare has
+            #yet to be determined; on 10 frames it is always found
+            bounds = None
+            if frame_number < 10:
+                bounds = tenpin_projection.scorer_bounds(scorer)
+            print(format_frame_report(frame_number,
+                    player_names[player_index], scorer.score, bounds))
+
+        def report_all_completed(frame_number):
+            #we clean up output for single players,
+            #and the final scores follow the last frame
+            if num_players > 1 and frame_number < 10:
+                print("Completed frame %d for all players."%frame_number)
+
+        #set after any recovered frames, which were reported at the time
+        score_sheet.on_frame = report_frame
+        score_sheet.on_all_completed = report_all_completed
+        for frame_index in range(10):
             for player_index in range(len(player_names)):#for each player
-                throws = ""
+                if len(recovered[player_index]) > frame_index:
+                    continue#recovered from the journal
+                throws = None
+                if journal is not None:#before waiting on the player
+                    journal.sync()
                 #frames entered in stdin must pass validation to be accepted
-                while not validate_frame_score(throws,False):
-                    throws = raw_input(("Input frame %d for player '%s' " 
+                while throws is None:
+                    throws = parse_frame_score(raw_input(
+                                        ("Input frame %d for player '%s' " 
                                         + "as comma-separated list of pins hit"
                                         + " including X or / as appropriate:\n")
                                         %((frame_index+1),player_names[
-                                                    player_index]))
-                #internally, frames are stored as lists of single character strings
-                score_sheet[player_index].append(throws.split(","))
-                print("Completed frame %d for player '%s'."
-                        %((frame_index+1),player_names[player_index]))
-                #score calculation returns None if the full value of a
-                #strike or spare has yet to be determined
-                score = calculate_current_score(score_sheet[player_index])
-                if score is not None:
-                    print("Their current score is %d"%score)
-                else:
-                    print("(Their current score is unavailable)")
-            if num_players > 1:#we clean up output for single players
-                print("Completed frame %d for all players."%(frame_index+1))
-        #the last frame is its own loop over the players
-        for player_index in range(len(player_names)):
-            throws = ""
-            while not validate_frame_score(throws,True):
-                throws = raw_input(("Input frame 10 for player '%s' " 
-                                    + "as comma-separated list of pins hit"
-                                    + " including X or / as appropriate:\n")
-                                    %(player_names[player_index]))
-            score_sheet[player_index].append(throws.split(","))
-            print("Completed frame 10 for player '%s'"
-                        %player_names[player_index])
-            #on 10 frames, we can always find the final score
-            print("Final score: " + str(calculate_current_score(
-                                                score_sheet[player_index])))
+                                            player_index])),frame_index == 9)
+                if journal is not None:
+                    journal.add_frame(JOURNAL_GAME_ID, player_index, throws)
+                score_sheet.submit(player_index, throws)
             
+        if journal is not None:
+            journal.end_game(JOURNAL_GAME_ID)
+            journal.close()
         
         print("Game Complete.\nFinal Scores:")
         
         for player_index,name in enumerate(player_names):
-            print(name + ": " + str(calculate_current_score(score_sheet[player_index])))
-    
\ No newline at end of file
+            print(name + ": " + str(score_sheet.score(player_index)))
+
+
+#begin standalone execution
+if __name__ == '__main__':
+    main()
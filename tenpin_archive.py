@@ -0,0 +1,193 @@
+""" A binary archive of completed games with random access
+
+    An archive file is a short header followed by fixed-width records,
+    one per game, each holding
+
+        player id       unsigned 32 bit integer
+        throws          21 signed bytes, laid out as in tenpin_core.Game.slots
+        final score     unsigned 16 bit integer
+
+    padded to 32 bytes, all little-endian. Archives are written one
+    game after another by ArchiveWriter and read through mmap by
+    Archive, so the Nth game can be looked at without reading any of
+    the others.
+"""
+
+import mmap
+import struct
+
+import tenpin_core
+
+MAGIC = b'TPGA'
+VERSION = 1
+HEADER = struct.Struct('<4sHH8x')
+RECORD = struct.Struct('<I21bH5x')
+_THROWS = struct.Struct('<21b')
+_PLAYER_ID = struct.Struct('<I')
+_SCORE = struct.Struct('<H')
+#where the throws and final score sit within a record
+_THROWS_OFFSET = 4
+_SCORE_OFFSET = 25
+
+
+class ArchiveWriter(object):
+    """ Appends completed games to an archive file, creating it with a
+        header if it doesn't exist yet
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'ab')
+        try:
+            if self._file.tell() == 0:
+                self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            else:
+                _check_header(path)
+        except Exception:
+            self._file.close()
+            raise
+
+    def write(self, player_id, slots, final_score):
+        """ Appends one game given as its 21 throw slots """
+        self._file.write(RECORD.pack(player_id, *(list(slots)
+                                                  + [final_score])))
+
+    def write_game(self, player_id, frames):
+        """ Appends one completed game given as a list of lists of
+                strings, as stored in a score sheet
+        """
+        if len(frames) != 10:
+            raise ValueError("only completed games can be archived")
+        slots = tenpin_core.Game.from_frames(frames).slots()
+        self.write(player_id, slots, tenpin_core.score_slots(slots))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameRecord(object):
+    """ A view of one record in an Archive; fields are read from the
+        mapped file when asked for, not copied out up front
+    """
+    __slots__ = ('_buffer', '_offset')
+
+    def __init__(self, buffer, offset):
+        self._buffer = buffer
+        self._offset = offset
+
+    @property
+    def player_id(self):
+        return _PLAYER_ID.unpack_from(self._buffer, self._offset)[0]
+
+    @property
+    def slots(self):
+        """ The game's 21 throw slots as a tuple of pin counts """
+        return _THROWS.unpack_from(self._buffer,
+                                   self._offset + _THROWS_OFFSET)
+
+    @property
+    def final_score(self):
+        """ The final score stored when the game was archived """
+        return _SCORE.unpack_from(self._buffer,
+                                  self._offset + _SCORE_OFFSET)[0]
+
+    def rescore(self):
+        """ Scores the game again from its throws """
+        return tenpin_core.score_slots(self.slots)
+
+    def frames(self):
+        """ Returns the game as a list of lists of strings,
+                as stored in a score sheet
+        """
+        slots = self.slots
+        frames = []
+        for i in range(0, 18, 2):
+            if slots[i] == 10:
+                frames.append(tenpin_core.pins_notation(slots[i:i + 1]))
+            else:
+                frames.append(tenpin_core.pins_notation(slots[i:i + 2]))
+        tenth = slots[18:21]
+        if tenth[0] + tenth[1] < 10:
+            tenth = tenth[:2]
+        frames.append(tenpin_core.pins_notation(tenth))
+        return frames
+
+
+class Archive(object):
+    """ Read-only random access to the games in an archive file """
+
+    def __init__(self, path):
+        _check_header(path)
+        with open(path, 'rb') as archive_file:
+            self._map = mmap.mmap(archive_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        self._count = (len(self._map) - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("archive index out of range")
+        return GameRecord(self._map, HEADER.size + index * RECORD.size)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield GameRecord(self._map, HEADER.size + index * RECORD.size)
+
+    def records_array(self):
+        """ Returns every record as a NumPy structured array with fields
+                'player_id', 'throws' and 'final_score', sharing memory
+                with the mapped file; its 'throws' field can be passed
+                straight to tenpin_batch.score_batch. The array must not
+                be used after the archive is closed.
+        """
+        import numpy as np
+        dtype = np.dtype([('player_id', '<u4'), ('throws', 'i1', (21,)),
+                          ('final_score', '<u2'), ('padding', 'V5')])
+        return np.frombuffer(self._map, dtype=dtype, count=self._count,
+                             offset=HEADER.size)
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _check_header(path):
+    """ Raises ValueError unless path starts with a valid archive header """
+    with open(path, 'rb') as archive_file:
+        header = archive_file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError("%s is not a game archive"%path)
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC or record_size != RECORD.size:
+        raise ValueError("%s is not a game archive"%path)
+    if version != VERSION:
+        raise ValueError("%s is archive version %d, expected %d"
+                         %(path, version, VERSION))
+
+def archive_score_sheet(path, score_sheet, player_ids=None):
+    """ Appends every player's completed game to the archive at path
+
+        score_sheet: a list with each player's frames, as built by the
+            interactive application
+        player_ids: an integer id for each player; defaults to their
+            positions in score_sheet, counting from 0
+    """
+    if player_ids is None:
+        player_ids = range(len(score_sheet))
+    with ArchiveWriter(path) as writer:
+        for player_id, frames in zip(player_ids, score_sheet):
+            writer.write_game(player_id, frames)
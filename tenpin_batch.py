@@ -0,0 +1,120 @@
+""" Vectorized scoring of many completed games at once with NumPy
+
+    Games are laid out as an (N games x 21 throws) array of pin counts,
+    using the slots described in tenpin_core.Game.slots. Scoring walks the
+    ten frames of every game together, so the Python-level work is the
+    same for a hundred games as for a million.
+
+    Running this module directly benchmarks the batch scorer against
+    calling tenpin_core.calculate_current_score on one game at a time.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import tenpin_core
+
+
+def frames_to_array(games):
+    """ Converts completed games into a pin count array for score_batch
+
+        games: an iterable of score sheets, each a list of lists of
+            strings as accepted by calculate_current_score
+
+        return value: an (N x 21) numpy array of 16 bit pin counts
+    """
+    #distinct frames are few, so their pin counts are looked up rather
+    #than converted from strings every time they appear
+    pins_for = {}
+    rows = []
+    for frames in games:
+        row = [0] * 21
+        for f, frame in enumerate(frames):
+            key = tuple(frame)
+            pins = pins_for.get(key)
+            if pins is None:
+                pins = pins_for[key] = tenpin_core.frame_pins(frame)
+            row[2 * f:2 * f + len(pins)] = pins
+        rows.append(row)
+    return np.array(rows, dtype=np.int16).reshape(-1, 21)
+
+
+def score_batch(slots):
+    """ Scores many completed games at once
+
+        slots: an (N x 21) array of pin counts, as returned by
+            frames_to_array
+
+        return value: a tuple of (final scores, cumulative frame scores);
+            the first is an array of N final scores and the second an
+            (N x 10) array of each game's running score after each frame
+    """
+    a = np.asarray(slots, dtype=np.int16)
+    first = a[:, 0:18:2]
+    second = a[:, 1:18:2]
+    strike = first == 10
+    spare = ~strike & (first + second == 10)
+    #the first ball after each of frames 1 to 9
+    next1 = a[:, 2:20:2]
+    #the ball after that; when the following frame is a strike in frames
+    #2 to 9 it is the first ball of the frame after, otherwise the
+    #following frame's second slot (the tenth always uses its second slot)
+    next2 = np.empty_like(first)
+    next2[:, :8] = np.where(a[:, 2:18:2] == 10, a[:, 4:20:2], a[:, 3:19:2])
+    next2[:, 8] = a[:, 19]
+    frame_scores = np.empty((a.shape[0], 10), dtype=np.int16)
+    frame_scores[:, :9] = first + second + np.where(strike, next1 + next2,
+                                                np.where(spare, next1, 0))
+    frame_scores[:, 9] = a[:, 18] + a[:, 19] + a[:, 20]
+    cumulative = np.cumsum(frame_scores, axis=1)
+    return cumulative[:, 9], cumulative
+
+
+def benchmark(num_games):
+    """ Times the batch scorer against the scalar scoring path
+
+        num_games: number of games to score on each path
+
+        return value: a dict of games per second for the scalar path,
+            the batch path including conversion from frame lists,
+            and the batch path alone
+    """
+    fixtures = [[['X'], ['X'], ['X'], ['X'], ['X'], ['X'], ['X'], ['X'],
+                 ['X'], ['X', 'X', 'X']],
+                [['X'], ['0', '0'], ['X'], ['0', '/'], ['X'], ['0', '0'],
+                 ['X'], ['0', '/'], ['X'], ['0', '/', '0']],
+                [['1', '2'], ['3', '4'], ['5', '/'], ['1', '2'], ['3', '4'],
+                 ['5', '/'], ['1', '2'], ['3', '4'], ['5', '/'],
+                 ['3', '/', 'X']],
+                [['7', '/'], ['X'], ['3', '0'], ['3', '4'], ['X'], ['X'],
+                 ['1', '/'], ['9', '0'], ['X'], ['X', '3', '/']]]
+    games = [fixtures[i % len(fixtures)] for i in range(num_games)]
+
+    start = time.time()
+    scalar = [tenpin_core.calculate_current_score(frames) for frames in games]
+    scalar_time = time.time() - start
+
+    start = time.time()
+    slots = frames_to_array(games)
+    convert_time = time.time() - start
+    start = time.time()
+    batch, _ = score_batch(slots)
+    batch_time = time.time() - start
+
+    if list(batch) != scalar:
+        raise AssertionError("batch scores differ from scalar scores")
+    return {'scalar': num_games / scalar_time,
+            'batch_with_conversion': num_games / (convert_time + batch_time),
+            'batch': num_games / batch_time}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='benchmark batch scoring against the scalar path')
+    parser.add_argument('--games', type=int, default=200000,
+        help='number of games to score (default 200000)')
+    args = parser.parse_args()
+    for path, rate in sorted(benchmark(args.games).items()):
+        print("%-22s %12.0f games/second"%(path, rate))
@@ -0,0 +1,245 @@
+""" Benchmark suite for validation, scoring and whole-game throughput
+
+    Games are generated from a seeded random number generator, so every
+    run scores exactly the same games. Each stage is timed separately
+    for several mixes of frames:
+
+        strike  mostly strikes
+        spare   mostly spares
+        open    mostly open frames
+        mixed   strikes, spares and open frames equally often
+
+    Results can be saved to JSON with --output and compared against an
+    earlier run with --compare; any stage that got slower by more than
+    --threshold is reported, and the exit status is then 1.
+
+    Where tracemalloc can be imported, each stage also reports the most
+    memory allocated at once while processing a game, traced one game
+    at a time and averaged. CPython 2.7 has no tracemalloc and no other
+    way to count allocations, so there only games per second are
+    reported.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:#not available before Python 3.4
+    tracemalloc = None
+
+import tenpin_core
+
+#chances of a strike, a spare and an open frame for each mix
+MIXES = {'strike': (0.6, 0.25, 0.15),
+         'spare': (0.15, 0.6, 0.25),
+         'open': (0.05, 0.15, 0.8),
+         'mixed': (1 / 3.0, 1 / 3.0, 1 / 3.0)}
+
+
+def _ball(rng, previous=None):
+    """ Returns a random throw as a string, at a full rack or, when
+            previous is given, at whatever it left standing
+    """
+    if previous is None:
+        pins = rng.randint(0, 10)
+        return 'X' if pins == 10 else str(pins)
+    standing = 10 - int(previous)
+    pins = rng.randint(0, standing)
+    return '/' if pins == standing else str(pins)
+
+def random_frame(rng, weights, tenth):
+    """ Returns one random valid frame as a list of strings
+
+        rng: a random.Random
+        weights: chances of a strike, a spare and an open frame,
+            as in MIXES
+        tenth: a boolean value, True for the tenth frame
+    """
+    roll = rng.random()
+    if roll < weights[0]:
+        frame = ['X']
+        if tenth:#two fill balls, the second at whatever is left standing
+            frame.append(_ball(rng))
+            if frame[1] == 'X':
+                frame.append(_ball(rng))
+            else:
+                frame.append(_ball(rng, frame[1]))
+    elif roll < weights[0] + weights[1]:
+        frame = [str(rng.randint(0, 9)), '/']
+        if tenth:
+            frame.append(_ball(rng))
+    else:
+        first = rng.randint(0, 9)
+        frame = [str(first), str(rng.randint(0, 9 - first))]
+    return frame
+
+def random_games(count, mix='mixed', seed=0):
+    """ Returns count random complete games, each a list of lists of
+            strings as stored in a score sheet; the same arguments
+            always give the same games
+    """
+    rng = random.Random(seed)
+    weights = MIXES[mix]
+    return [[random_frame(rng, weights, f == 9) for f in range(10)]
+            for g in range(count)]
+
+
+def bench_validate(games):
+    strings = [[','.join(frame) for frame in game] for game in games]
+    def run():
+        validate = tenpin_core.validate_frame_score
+        for game in strings:
+            for f, frame in enumerate(game):
+                validate(frame, f == 9)
+    return run
+
+def bench_next_throws_value(games):
+    def run():
+        next_throws = tenpin_core.next_throws_value
+        for game in games:
+            for f, frame in enumerate(game):
+                if frame[0] == 'X':
+                    next_throws(game, f, 2)
+                elif frame[1] == '/':
+                    next_throws(game, f, 1)
+    return run
+
+def bench_calculate_current_score(games):
+    def run():
+        calculate = tenpin_core.calculate_current_score
+        for game in games:
+            calculate(game)
+    return run
+
+def bench_full_game(games):
+    """ Enters every frame of every game as the interactive loop does:
+            parsing each entered string and updating a FrameScorer
+    """
+    strings = [[','.join(frame) for frame in game] for game in games]
+    def run():
+        parse = tenpin_core.parse_frame_score
+        for game in strings:
+            scorer = tenpin_core.FrameScorer()
+            for f, frame in enumerate(game):
+                scorer.add_frame(parse(frame, f == 9))
+    return run
+
+STAGES = [('validate_frame_score', bench_validate),
+          ('next_throws_value', bench_next_throws_value),
+          ('calculate_current_score', bench_calculate_current_score),
+          ('full_game', bench_full_game)]
+
+
+def measure(bench, games, repeat):
+    """ Times the stage bench builds for games, repeat times
+
+        bench: one of the bench_* functions in STAGES
+        games: the games to process, as returned by random_games
+
+        return value: a dict of the best games per second and, if
+            tracemalloc is available, the mean of the most memory
+            allocated at once while processing each game on its own
+    """
+    run = bench(games)
+    best = None
+    for r in range(repeat):
+        start = time.time()
+        run()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    result = {'games_per_second': len(games) / best}
+    if tracemalloc is not None:
+        #a game's memory is freed before the next game starts, so the
+        #peak over a whole run is one game's; tracing each game alone
+        #gives a figure that doesn't depend on how many games are run
+        total = 0
+        for game in games:
+            run_one = bench([game])
+            tracemalloc.start()
+            try:
+                run_one()
+                total += tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        result['peak_bytes_per_game'] = total / float(len(games))
+    return result
+
+def run_suite(num_games, seed, repeat):
+    """ Benchmarks every stage on every mix of frames
+
+        return value: a dict ready to be saved as JSON, holding the
+            run's settings and a "results" dict keyed "stage/mix"
+    """
+    results = {}
+    for mix in sorted(MIXES):
+        games = random_games(num_games, mix, seed)
+        for stage, bench in STAGES:
+            results[stage + '/' + mix] = measure(bench, games, repeat)
+    return {'python': platform.python_version(),
+            'games': num_games,
+            'seed': seed,
+            'repeat': repeat,
+            'results': results}
+
+def compare(baseline, current, threshold):
+    """ Compares two suite results by games per second
+
+        threshold: the fraction slower a stage may get before it is
+            counted as a regression, e.g. 0.1 for 10%
+
+        return value: a list of (name, baseline rate, current rate,
+            regressed) tuples for every stage in both results
+    """
+    rows = []
+    for name in sorted(current['results']):
+        if name not in baseline['results']:
+            continue
+        old = baseline['results'][name]['games_per_second']
+        new = current['results'][name]['games_per_second']
+        rows.append((name, old, new, new < old * (1 - threshold)))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='benchmark frame validation, scoring and whole games')
+    parser.add_argument('--games', type=int, default=20000,
+        help='games generated for each mix (default 20000)')
+    parser.add_argument('--seed', type=int, default=0,
+        help='seed for game generation (default 0)')
+    parser.add_argument('--repeat', type=int, default=3,
+        help='timed runs per stage, keeping the best (default 3)')
+    parser.add_argument('--output', metavar='FILE',
+        help='save results as JSON to FILE')
+    parser.add_argument('--compare', metavar='FILE',
+        help='compare against results saved earlier in FILE')
+    parser.add_argument('--threshold', type=float, default=0.1,
+        help='slowdown counted as a regression (default 0.1 for 10%%)')
+    args = parser.parse_args()
+
+    suite = run_suite(args.games, args.seed, args.repeat)
+    for name, result in sorted(suite['results'].items()):
+        line = "%-32s %12.0f games/second"%(name, result['games_per_second'])
+        if 'peak_bytes_per_game' in result:
+            line += " %10.1f peak bytes/game"%result['peak_bytes_per_game']
+        print(line)
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            json.dump(suite, outfile, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as infile:
+            baseline = json.load(infile)
+        regressions = 0
+        print("\nCompared with %s:"%args.compare)
+        for name, old, new, regressed in compare(baseline, suite,
+                                                 args.threshold):
+            print("%-32s %+7.1f%%%s"%(name, (new / old - 1) * 100,
+                                      '  REGRESSION' if regressed else ''))
+            regressions += regressed
+        sys.exit(1 if regressions else 0)
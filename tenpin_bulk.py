@@ -0,0 +1,98 @@
+""" Non-interactive scoring of games read from a file or stdin
+
+    Each line holds one complete game: the player's name followed by
+    their ten frames, separated by '|', e.g.
+
+        Alice|X|7,/|9,0|X|0,8|8,/|0,6|X|X|X,8,1
+
+    Games are read, validated, scored and written out one at a time
+    through a chain of generators, so memory use stays the same however
+    large the input is. Malformed lines are reported with their line
+    numbers and skipped.
+"""
+
+import tenpin_core
+
+
+def parse_game_line(line):
+    """ Splits one input line into a player name and their frames
+
+        line: a string of the form "name|frame 1|...|frame 10",
+            without its trailing newline
+
+        return value: a tuple of (name, frames) where frames is a list
+            of lists of strings, as stored in a score sheet;
+            raises ValueError describing the problem if the line
+            isn't a valid game
+    """
+    fields = line.split('|')
+    name = fields[0]
+    if len(fields) != 11:
+        raise ValueError("expected a name and 10 frames, found %d frames"
+                         %(len(fields) - 1))
+    frames = []
+    for f, frame in enumerate(fields[1:]):
+        throws = tenpin_core.parse_frame_score(frame, f == 9)
+        if throws is None:
+            raise ValueError("invalid frame %d: '%s'"%(f + 1, frame))
+        frames.append(list(throws))
+    return name, frames
+
+def number_lines(stream):
+    """ Yields (line number, line) for each non-blank line of stream,
+            with trailing newlines removed and numbering from 1
+    """
+    for lineno, line in enumerate(stream, 1):
+        line = line.rstrip('\r\n')
+        if line.strip():
+            yield lineno, line
+
+def parse_games(numbered_lines):
+    """ Yields (line number, name, frames, error) for each input line;
+            error is None for a valid game, and otherwise describes
+            why the line was rejected (frames is then None)
+    """
+    for lineno, line in numbered_lines:
+        try:
+            name, frames = parse_game_line(line)
+        except ValueError as e:
+            yield lineno, None, None, str(e)
+        else:
+            yield lineno, name, frames, None
+
+def score_games(games):
+    """ Yields (line number, name, score, error) for each parsed game
+            from parse_games, passing rejected lines through unscored
+    """
+    calculate = tenpin_core.calculate_current_score
+    for lineno, name, frames, error in games:
+        if error is None:
+            yield lineno, name, calculate(frames), None
+        else:
+            yield lineno, name, None, error
+
+def run_bulk(infile, outfile, errfile):
+    """ Scores every game in infile, writing "name: score" lines to
+            outfile and "line N: problem" lines to errfile as it goes
+
+        return value: a tuple of (games scored, lines rejected)
+    """
+    return write_results(score_games(parse_games(number_lines(infile))),
+                         outfile, errfile)
+
+def write_results(results, outfile, errfile):
+    """ Writes "name: score" lines to outfile and "line N: problem"
+            lines to errfile for each result from score_games
+
+        return value: a tuple of (games scored, lines rejected)
+    """
+    scored = 0
+    rejected = 0
+    for lineno, name, score, error in results:
+        if error is None:
+            outfile.write("%s: %d\n"%(name, score))
+            scored += 1
+        else:
+            errfile.write("line %d: %s\n"%(lineno, error))
+            rejected += 1
+    return scored, rejected
@@ -0,0 +1,642 @@
+""" The scoring core of tenpin.py: validating frames and scoring games
+
+    This module imports nothing heavier than array and collections, so
+    scripts and lane kiosks that only need to score games can import it
+    without paying for the command line, the interactive prompts or the
+    tests that tenpin.py carries.
+
+    value of strike frame is 10 + next 2 throws
+    value of spare frame is 10 + next throw
+    value of open frame is face value
+"""
+
+from array import array
+from collections import namedtuple, OrderedDict
+
+def _build_frame_tables():
+    """ Lists every legal frame string along with its parsed throws
+
+        return value: a tuple of two dicts, for normal frames and for
+            tenth frames, each mapping a frame string such as "5,/"
+            to a tuple of single character strings such as ("5","/")
+    """
+    normal = {'X': ('X',)}
+    tenth = {}
+    fills = [str(c) for c in range(10)] + ['X']
+    for a in range(10):
+        first = str(a)
+        normal[first + ',/'] = (first, '/')
+        tenth['X,' + first + ',/'] = ('X', first, '/')
+        for fill in fills:
+            tenth[first + ',/,' + fill] = (first, '/', fill)
+        for b in range(10 - a):
+            second = str(b)
+            normal[first + ',' + second] = (first, second)
+            tenth[first + ',' + second] = (first, second)
+            tenth['X,' + first + ',' + second] = ('X', first, second)
+    for fill in fills:
+        tenth['X,X,' + fill] = ('X', 'X', fill)
+    return normal, tenth
+
+#there are only a few hundred legal frames, so they are all worked out
+#once and validation becomes a single dictionary lookup
+_NORMAL_FRAMES, _TENTH_FRAMES = _build_frame_tables()
+#the same frames already parsed, for callers holding tuples of throws
+_NORMAL_THROWS = frozenset(_NORMAL_FRAMES.values())
+_TENTH_THROWS = frozenset(_TENTH_FRAMES.values())
+
+def parse_frame_score(frame, tenth):
+    """ Validates and parses an entered frame score in string form
+
+        frame: a string to parse, e.g. "5,/"
+        tenth: a boolean value, True if this is the 10th frame
+            and False otherwise
+
+        return value: a tuple of single character strings such as
+            ("5","/") if the frame is valid, and None otherwise
+    """
+    if tenth:
+        return _TENTH_FRAMES.get(frame)
+    return _NORMAL_FRAMES.get(frame)
+
+def legal_frames(tenth):
+    """ Lists every frame string that validate_frame_score accepts
+
+        tenth: a boolean value, True for tenth frames
+            and False otherwise
+
+        return value: a sorted list of frame strings
+    """
+    if tenth:
+        return sorted(_TENTH_FRAMES)
+    return sorted(_NORMAL_FRAMES)
+
+def validate_frame_score(frame, tenth):
+    """ Validates an entered frame score in string form by looking it
+        up in the table of every legal frame
+
+        frame: a string to validate
+        tenth: a boolean value, True if this is the 10th frame
+            and False otherwise
+
+        Expected formats on non-thenth frames are "X",
+            or strings which fit the regular expression
+            "^([0-9]),([0-9\/])$"
+            where the sum of digits is never more than 10
+
+        Expected formats on the tenth frame are either "X,X,X",
+            ["X","{int<=9}","/"], ["X","{int}","{int}"], "{int},/,X", "{int},/,{int}", "{int},/,{int}",
+                or "{int},{int}" where no int is >9 and where the sum of ints in the last
+                is never more than 10
+
+        return value: boolean True if the score is valid
+                    and boolean False otherwise
+    """
+    if tenth:
+        return frame in _TENTH_FRAMES
+    return frame in _NORMAL_FRAMES
+
+def validate_frame_throws(throws, tenth):
+    """ Validates a frame that has already been split into throws,
+            without joining it back into a string to parse again
+
+        throws: a tuple or list of single character strings,
+            e.g. ("5","/")
+        tenth: a boolean value, True if this is the 10th frame
+            and False otherwise
+
+        return value: boolean True if the frame is valid
+                    and boolean False otherwise
+    """
+    if tenth:
+        return tuple(throws) in _TENTH_THROWS
+    return tuple(throws) in _NORMAL_THROWS
+
+
+def next_throws_value(frames, f, n):
+    """ Returns the total pin value of the next n throws after 
+            frame f in frames. When called with f=9 (the 10th frame),
+            will instead return the value of the third throw of frame 10
+            (if n==1) or the second + third throw of frame 10 (if n==2)
+        
+        frames: a list of lists of strings;
+            each inner list will be
+            either ["X"] 
+            or ["{int 0<=a<=9}","/"] 
+            or ["{int a}","{int b}"] where 0<=a+b<=9
+        
+        f: in index for f; will start counting throw value _after_ frame f
+            (so this is useful for calculating the value of a spare or strike
+            in frame f)
+            
+        n: integer number of throws to tally value for after frame f;
+            will be either 1 or 2 in practice (for spares or strikes respectively)
+            
+        return value: an integer value for the next 1 or 2 throws after frame f;
+            a strike has value 10, and a spare has value 10 when considered
+            as two throws
+    """
+    counted = 0
+    total = 0
+    #if we are on a special three-throw last frame
+    if f == 9 and len(frames[9]) == 3:
+        if n == 1:#check last throw to fill out a spare
+            if frames[9][2]=='X':
+                return 10
+            else:
+                return int(frames[9][2])
+        else:#check last 2 frames to fill out a strike
+            if frames[9][2]=='/':#last 2 frame spare
+                return 10
+            elif frames[9][2]=='X':#last 2 frame double strike
+                return 20
+            elif frames[9][1]=='X':#strike followed by a numerical throw
+                return 10 + int(frames[9][2])
+            else:
+                return int(frames[9][1]) + int(frames[9][2])
+        return total
+    while counted < n:
+        for throw in frames[f+1]:
+            if throw == 'X':#in case of strike, one throw was worth 10
+                total += 10
+                counted +=1
+            elif throw == '/':#in case of spare
+                rem = total % 10#we fill out the current 10 pins
+                total -= rem
+                total += 10
+                counted +=1
+            else: #a numerical throw
+                total += int(throw)
+                counted +=1
+            if counted >=n:
+                break
+        if counted < n:
+            f += 1
+    return total
+def calculate_current_score(frames):
+    """ Returns a current score for the given frames.
+        Can be called for finished or unfinished sheets.
+        
+        frames: a list of lists of strings;
+            each inner list will be
+            either ["X"] 
+            or ["{int 0<=a<=9}","/"] 
+            or ["{int a}","{int b}"] where 0<=a+b<=9
+            
+        return value: null if the number can't currently be calculated 
+        (if the value of a strike or spare is still being determined);
+        otherwise, the current full value can be determined and displayed.
+        
+    """
+    total = 0
+    
+    for f,frame in enumerate(frames):
+        frame_total=0
+        if len(frame)==2:#spare or numerical
+            if frame[1]!='/':#if this isn't a spare
+                frame_total = int(frame[0]) + int(frame[1])
+            else: #if this is a spare
+                try:
+                    frame_total += (10 + next_throws_value(frames,f,1))
+                except IndexError:
+                    return None
+        elif len(frame)==1:#a single strike
+            try:
+                frame_total += (10 + next_throws_value(frames,f,2))
+            except IndexError:
+                return None
+        else: #a length 3 final frame
+            if frame[0] == 'X': #started with strike
+                frame_total += (10 + next_throws_value(frames,f,2))
+            else: #started with spare
+                frame_total += (10 + next_throws_value(frames,f,1))
+        total += frame_total
+    return total
+
+
+def frame_pins(frame):
+    """ Converts a frame from its list-of-strings form into a list
+            of integer pin counts, one per throw
+
+        frame: a list of strings as stored in a score sheet,
+            e.g. ["X"], ["5","/"] or ["X","7","/"]
+
+        return value: a list of integers between 0 and 10 inclusive;
+            a strike is worth 10 and a spare is worth whatever was
+            left standing after the previous throw
+    """
+    pins = []
+    for throw in frame:
+        if throw == 'X':
+            pins.append(10)
+        elif throw == '/':
+            pins.append(10 - pins[-1])
+        else:
+            pins.append(int(throw))
+    return pins
+
+
+class FrameScorer(object):
+    """ Keeps a running score for a single player, accepting one frame
+        (or one throw) at a time. Strikes and spares waiting on their
+        bonus throws are kept in a short queue, so every update costs
+        the same no matter how far into the game the player is.
+
+        After each completed frame, score matches what
+        calculate_current_score would return for the same frames.
+    """
+    __slots__ = ('frame_scores', 'frames_completed', '_total',
+                 '_pending', '_current')
+
+    def __init__(self):
+        #points for each completed frame; None while a bonus is unresolved
+        self.frame_scores = []
+        self.frames_completed = 0
+        self._total = 0
+        #each entry is [frame index, points so far, bonus throws remaining]
+        self._pending = []
+        #pin counts of the frame currently being thrown
+        self._current = []
+
+    @property
+    def score(self):
+        """ The current score, or None if the value of a strike or spare
+            is still being determined
+        """
+        if self._pending:
+            return None
+        return self._total
+
+    @property
+    def pending(self):
+        """ A tuple with a (points so far, bonus throws still needed)
+            pair for each strike or spare waiting on its bonus,
+            oldest first
+        """
+        return tuple((entry[1], entry[2]) for entry in self._pending)
+
+    def add_frame(self, frame):
+        """ Records a complete frame given as a list of strings,
+                as stored in a score sheet
+
+            frame: a list of strings such as ["X"] or ["5","/"]
+
+            return value: the current score after this frame, as
+                returned by the score property; raises ValueError if
+                ten frames have already been completed
+        """
+        for pins in frame_pins(frame):
+            self.add_throw(pins)
+        return self.score
+
+    def add_throw(self, pins):
+        """ Records a single throw, resolving any strike or spare
+                bonuses waiting on it
+
+            pins: integer number of pins knocked down, 0 to 10 inclusive;
+                the caller is responsible for validating the throw
+
+            return value: True if this throw completed a frame
+                and False otherwise; raises ValueError if ten frames
+                have already been completed
+        """
+        if self.frames_completed == 10:
+            raise ValueError("the game is over")
+        #bonuses first; a throw may count for up to two earlier frames
+        if self._pending:
+            still_pending = []
+            for entry in self._pending:
+                entry[1] += pins
+                entry[2] -= 1
+                if entry[2]:
+                    still_pending.append(entry)
+                else:
+                    self.frame_scores[entry[0]] = entry[1]
+                    self._total += entry[1]
+            self._pending = still_pending
+        current = self._current
+        current.append(pins)
+        frame_total = sum(current)
+        if self.frames_completed == 9:#the tenth frame is just its pins
+            if len(current) < 3 and (len(current) < 2 or frame_total >= 10):
+                return False
+            self.frame_scores.append(frame_total)
+            self._total += frame_total
+        elif pins == 10 and len(current) == 1:#strike
+            self._pending.append([self.frames_completed, 10, 2])
+            self.frame_scores.append(None)
+        elif len(current) < 2:
+            return False
+        elif frame_total == 10:#spare
+            self._pending.append([self.frames_completed, 10, 1])
+            self.frame_scores.append(None)
+        else:#open frame
+            self.frame_scores.append(frame_total)
+            self._total += frame_total
+        self.frames_completed += 1
+        self._current = []
+        return True
+
+
+def pins_notation(pins):
+    """ Converts a list of integer pin counts for one frame back into
+            the list-of-strings form used in score sheets;
+            the inverse of frame_pins
+
+        pins: a list of integers between 0 and 10 inclusive,
+            e.g. [10], [5,5] or [10,7,3]
+
+        return value: a list of strings such as ["X"], ["5","/"]
+            or ["X","7","/"]
+    """
+    notation = []
+    fresh = True#True when a full rack of 10 pins is standing
+    for p in pins:
+        if fresh and p == 10:
+            notation.append('X')
+        elif not fresh and p == standing:
+            notation.append('/')
+        else:
+            notation.append(str(p))
+        if fresh and p < 10:
+            fresh = False
+            standing = 10 - p
+        else:
+            fresh = True
+    return notation
+
+
+class Frame(object):
+    """ A single frame held as a tuple of integer pin counts """
+    __slots__ = ('pins',)
+
+    def __init__(self, pins):
+        self.pins = tuple(pins)
+
+    @classmethod
+    def from_notation(cls, frame):
+        """ Builds a Frame from a list of strings such as ["5","/"] """
+        return cls(frame_pins(frame))
+
+    def notation(self):
+        """ Returns this frame as a list of strings such as ["5","/"] """
+        return pins_notation(self.pins)
+
+    def is_strike(self):
+        return self.pins[0] == 10
+
+    def is_spare(self):
+        return self.pins[0] < 10 and self.pins[0] + self.pins[1] == 10
+
+    def __eq__(self, other):
+        return isinstance(other, Frame) and self.pins == other.pins
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.pins)
+
+    def __repr__(self):
+        return "Frame(%r)"%(self.pins,)
+
+
+class Game(object):
+    """ A compact score sheet for one player: the pin count of every
+        throw in a single signed byte array, with the offset of the
+        first throw of each frame kept in a second array beside it.
+
+        A full game takes at most 21 + 10 bytes of array storage,
+        rather than a list of lists of single character strings,
+        and scoring it never parses a string.
+    """
+    __slots__ = ('throws', 'offsets')
+
+    def __init__(self, throws=(), offsets=()):
+        self.throws = array('b', throws)
+        self.offsets = array('b', offsets)
+
+    @classmethod
+    def from_frames(cls, frames):
+        """ Builds a Game from a list of lists of strings,
+                as stored in a score sheet
+        """
+        game = cls()
+        for frame in frames:
+            game.append_frame(frame)
+        return game
+
+    def to_frames(self):
+        """ Returns this game as a list of lists of strings,
+                as stored in a score sheet
+        """
+        return [self.frame(f).notation() for f in range(len(self.offsets))]
+
+    def append_frame(self, frame):
+        """ Appends a complete frame given as a list of strings """
+        self.offsets.append(len(self.throws))
+        self.throws.extend(frame_pins(frame))
+
+    def frame(self, index):
+        """ Returns frame number index (counting from 0) as a Frame """
+        start = self.offsets[index]
+        if index + 1 < len(self.offsets):
+            return Frame(self.throws[start:self.offsets[index + 1]])
+        return Frame(self.throws[start:])
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def slots(self):
+        """ Returns this game laid out in the traditional 21 throw slots:
+                two per frame for frames 1 to 9 (a strike leaves its
+                second slot at 0) and three for the tenth frame, with
+                any unused slot left at 0
+        """
+        slots = [0] * 21
+        throws = self.throws
+        for f, i in enumerate(self.offsets):
+            if f == 9:
+                for t, pins in enumerate(throws[i:]):
+                    slots[18 + t] = pins
+            else:
+                slots[2 * f] = throws[i]
+                if throws[i] < 10:
+                    slots[2 * f + 1] = throws[i + 1]
+        return slots
+
+    def score(self):
+        """ Returns the current score of this game;
+                same results as calculate_current_score, including
+                None while the value of a strike or spare is still
+                being determined
+        """
+        throws = self.throws
+        n = len(throws)
+        total = 0
+        for f, i in enumerate(self.offsets):
+            first = throws[i]
+            if f == 9:#the tenth frame is just its pins
+                total += sum(throws[i:])
+            elif first == 10:#strike
+                if i + 2 >= n:
+                    return None
+                total += 10 + throws[i + 1] + throws[i + 2]
+            elif first + throws[i + 1] == 10:#spare
+                if i + 2 >= n:
+                    return None
+                total += 10 + throws[i + 2]
+            else:
+                total += first + throws[i + 1]
+        return total
+
+
+def score_slots(slots):
+    """ Returns the final score of a completed game laid out in the
+            21 throw slots described in Game.slots
+
+        slots: any sequence of 21 integer pin counts
+            (a list, a tuple, an array or similar)
+
+        return value: the game's final score
+    """
+    total = 0
+    for i in range(0, 18, 2):
+        first = slots[i]
+        if first == 10:#strike
+            following = slots[i + 2]
+            if following == 10 and i < 16:#another strike before the tenth
+                total += 20 + slots[i + 4]
+            else:
+                total += 10 + following + slots[i + 3]
+        elif first + slots[i + 1] == 10:#spare
+            total += 10 + slots[i + 2]
+        else:
+            total += first + slots[i + 1]
+    return total + slots[18] + slots[19] + slots[20]
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class FrameWindowCache(object):
+    """ Scores games by looking up the value of each frame in a bounded
+        cache keyed on the frame and the throws it takes a bonus from.
+
+        A frame's value depends only on the frame itself and, for a
+        strike or spare, the next two or one throws, so there are only
+        a few hundred distinct windows; once they have all been seen,
+        scoring a game is ten lookups and a sum.
+    """
+
+    def __init__(self, maxsize=1024):
+        """ maxsize: the largest number of windows kept; once full, the
+                oldest window is dropped to make room for a new one;
+                raises ValueError if less than 1
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+
+    def cache_info(self):
+        """ Returns a CacheInfo of hits, misses, maxsize and currsize """
+        return CacheInfo(self.hits, self.misses, self.maxsize,
+                         len(self._values))
+
+    def clear(self):
+        """ Empties the cache and resets its counters """
+        self._values.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def frame_value(self, frame, lookahead):
+        """ Returns the value of a single frame
+
+            frame: a tuple of strings such as ("X",) or ("5","/")
+            lookahead: a tuple of up to two strings, the throws that
+                follow frame; only as many as frame needs for its
+                bonus are looked at
+
+            return value: the points the frame is worth, or None if
+                lookahead doesn't yet hold enough throws to tell
+        """
+        key = (frame, lookahead)
+        value = self._values.get(key, _MISSING)
+        if value is _MISSING:
+            return self._add(key)
+        self.hits += 1
+        return value
+
+    def _add(self, key):
+        """ Works out the value of the frame window key, a tuple of
+                (frame, lookahead), and caches it
+        """
+        self.misses += 1
+        frame, lookahead = key
+        if len(frame) == 3:#the tenth frame is just its pins
+            value = sum(frame_pins(frame))
+        elif frame[0] == 'X':#strike
+            if len(lookahead) < 2:
+                value = None
+            else:
+                value = 10 + sum(frame_pins(lookahead[:2]))
+        elif frame[1] == '/':#spare
+            if not lookahead:
+                value = None
+            else:
+                value = 10 + frame_pins(lookahead[:1])[0]
+        else:
+            value = int(frame[0]) + int(frame[1])
+        if len(self._values) >= self.maxsize:
+            self._values.popitem(last=False)
+        self._values[key] = value
+        return value
+
+    def score(self, frames):
+        """ Returns a current score for the given frames, with the same
+                results as calculate_current_score
+
+            frames: a list of lists of strings, as stored in a score sheet
+
+            return value: None if the value of a strike or spare is
+                still being determined, and the current score otherwise
+        """
+        values = self._values
+        total = 0
+        hits = 0
+        value = 0
+        n = len(frames)
+        for f, frame in enumerate(frames):
+            #only strikes and spares look ahead; every other frame
+            #has a single window of its own
+            frame = tuple(frame)
+            if frame == _STRIKE and f + 1 < n:
+                following = frames[f + 1]
+                if len(following) == 1 and f + 2 < n:
+                    key = (frame, (following[0], frames[f + 2][0]))
+                else:
+                    key = (frame, tuple(following[:2]))
+            elif len(frame) == 2 and frame[1] == '/' and f + 1 < n:
+                key = (frame, (frames[f + 1][0],))
+            else:
+                key = (frame, ())
+            value = values.get(key, _MISSING)
+            if value is _MISSING:
+                value = self._add(key)
+            else:
+                hits += 1
+            if value is None:
+                break
+            total += value
+        self.hits += hits
+        if value is None:
+            return None
+        return total
+
+#FrameWindowCache caches None for unresolved frames,
+#so a missing window is marked with its own sentinel
+_MISSING = object()
+_STRIKE = ('X',)
@@ -0,0 +1,444 @@
+""" Differential testing of every scoring path against the reference
+
+    calculate_current_score (with next_throws_value) is the reference
+    for scoring, and a copy of the regular expression validator the
+    application started out with is the reference for validation.
+    This module generates large numbers of random games, complete and
+    part played, and runs every scoring engine on each one; it also
+    generates frame strings that are valid or very nearly so and runs
+    them through validate_frame_score and parse_frame_score. Games are
+    also checked exhaustively: every legal tenth frame after every
+    legal ninth frame, with the eighth a strike, a spare or open.
+
+    Any disagreement is shrunk to a minimal reproducer, the shortest
+    and simplest game or string that still disagrees, and reported
+    with what each engine gave. The sweep is split into chunks that are
+    checked across a pool of worker processes.
+
+    Running this module directly runs a full sweep; the exit status
+    is 1 if any disagreement was found.
+"""
+
+import argparse
+import multiprocessing
+import random
+import re
+import sys
+import time
+
+import tenpin_core
+import tenpin_game
+import tenpin_projection
+import tenpin_stream
+
+try:
+    import numpy
+    import tenpin_batch
+except ImportError:
+    numpy = None
+
+#characters near-valid frame strings are made from; the rarer ones
+#are listed once, the common ones several times
+_ALPHABET = '0123456789X/,' * 3 + ' x-\n'
+
+#returned by engines for games they don't handle
+NOT_APPLICABLE = object()
+
+#at most this many disagreements are reported from each chunk
+MAX_FAILURES_PER_CHUNK = 5
+
+
+def reference_validate_frame_score(frame, tenth):
+    """ The regular expression validator validate_frame_score replaced,
+            kept as the reference for validation
+    """
+    min_length = 1
+    max_length = 3
+    if tenth:
+        min_length += 2
+        max_length += 2
+    length = len(frame)
+    if (length < min_length) or (length > max_length):
+        return False
+    if not tenth:
+        if length == 1:
+            return frame == 'X'
+        m = re.search("^([0-9]),([0-9\/])$", frame)
+        if m is None:
+            return False
+        return (m.groups()[1] == "/"
+                or (int(m.groups()[0]) + int(m.groups()[1])) < 10)
+    if length == 3:
+        m = re.search("^([0-9]),([0-9])$", frame)
+        if m is None:
+            return False
+        return (int(m.groups()[0]) + int(m.groups()[1])) < 10
+    m = re.search("^([0-9]),(\/),([0-9X])$|^(X),([0-9]),([0-9\/])$"
+                  + "|^(X),(X),([0-9X])$", frame)
+    if m is None:
+        return False
+    if m.groups()[0]:
+        return True
+    if m.groups()[3] is not None:
+        if m.groups()[5] == '/':
+            return True
+        return (int(m.groups()[4]) + int(m.groups()[5])) < 10
+    return bool(m.groups()[6])
+
+
+def _frame_scorer(frames):
+    scorer = tenpin_core.FrameScorer()
+    for frame in frames:
+        scorer.add_frame(frame)
+    return scorer.score
+
+def _game(frames):
+    return tenpin_core.Game.from_frames(frames).score()
+
+#small enough that windows are evicted as well as cached
+_window_cache = tenpin_core.FrameWindowCache(maxsize=64)
+
+def _window_cache_score(frames):
+    return _window_cache.score(frames)
+
+def _slots(frames):
+    if len(frames) != 10:#only complete games fill all 21 slots
+        return NOT_APPLICABLE
+    return tenpin_core.score_slots(tenpin_core.Game.from_frames(frames)
+                                   .slots())
+
+def _projection(frames):
+    return tenpin_projection.score_bounds(frames).current
+
+def _stream(frames):
+    stream = tenpin_stream.ThrowStream()
+    for frame in frames:
+        for pins in tenpin_core.frame_pins(frame):
+            stream.throw(pins)
+    return stream.scorer.score
+
+def _shared_score_sheet(frames):
+    sheet = tenpin_game.SharedScoreSheet(['fuzz'])
+    for frame in frames:
+        sheet.submit(0, frame)
+    return sheet.score(0)
+
+#(name, function) for every engine compared with the reference; each
+#function takes a list of frames and returns a score or None, or
+#NOT_APPLICABLE for games it doesn't handle
+ENGINES = [('FrameScorer', _frame_scorer),
+           ('Game.score', _game),
+           ('FrameWindowCache', _window_cache_score),
+           ('score_slots', _slots),
+           ('score_bounds', _projection),
+           ('ThrowStream', _stream),
+           ('SharedScoreSheet', _shared_score_sheet)]
+
+
+def _call(function, *args):
+    """ Returns what function gives for args, or the repr of any
+            exception it raises, so exceptions can be compared too
+    """
+    try:
+        return function(*args)
+    except Exception as e:
+        return "raised %r"%e
+
+def check_game(frames, engines=None):
+    """ Scores frames with the reference and every engine
+
+        engines: a list of (name, function) pairs, ENGINES by default
+
+        return value: a list of (engine name, its result, reference
+            result) for every engine that disagreed
+    """
+    if engines is None:
+        engines = ENGINES
+    expected = _call(tenpin_core.calculate_current_score, frames)
+    disagreements = []
+    for name, function in engines:
+        result = _call(function, frames)
+        if result is not NOT_APPLICABLE and result != expected:
+            disagreements.append((name, result, expected))
+    return disagreements
+
+def check_frame_string(frame, tenth):
+    """ Validates and parses frame against the reference validator
+
+        return value: a list of (function name, its result, expected
+            result) for every disagreement
+    """
+    expected = reference_validate_frame_score(frame, tenth)
+    disagreements = []
+    valid = _call(tenpin_core.validate_frame_score, frame, tenth)
+    if valid != expected:
+        disagreements.append(('validate_frame_score', valid, expected))
+    parsed = _call(tenpin_core.parse_frame_score, frame, tenth)
+    if expected:
+        if parsed is None or ','.join(parsed) != frame:
+            disagreements.append(('parse_frame_score', parsed,
+                                  tuple(frame.split(','))))
+    elif parsed is not None:
+        disagreements.append(('parse_frame_score', parsed, None))
+    return disagreements
+
+
+def minimize_game(frames, fails):
+    """ Shrinks a game while fails(game) stays true: first to its
+            shortest failing prefix, then replacing frames with
+            gutter frames wherever that keeps it failing
+    """
+    for length in range(len(frames) + 1):
+        if fails(frames[:length]):
+            frames = frames[:length]
+            break
+    frames = [list(frame) for frame in frames]
+    for f in range(len(frames)):
+        if frames[f] != ['0', '0']:
+            simpler = frames[:f] + [['0', '0']] + frames[f + 1:]
+            if fails(simpler):
+                frames = simpler
+    return frames
+
+def minimize_string(frame, fails):
+    """ Shrinks a frame string by deleting characters, one at a time,
+            while fails(string) stays true
+    """
+    shrunk = True
+    while shrunk:
+        shrunk = False
+        for i in range(len(frame)):
+            shorter = frame[:i] + frame[i + 1:]
+            if fails(shorter):
+                frame = shorter
+                shrunk = True
+                break
+    return frame
+
+
+def random_game(rng, normal_frames, tenth_frames):
+    """ Returns a random complete game as a list of lists of strings,
+            its frames drawn either uniformly from the legal frames or
+            from one of tenpin_bench's mixes of strikes and spares
+    """
+    import tenpin_bench
+    mix = rng.choice(sorted(tenpin_bench.MIXES) + ['uniform'])
+    if mix == 'uniform':
+        return ([rng.choice(normal_frames).split(',') for f in range(9)]
+                + [rng.choice(tenth_frames).split(',')])
+    weights = tenpin_bench.MIXES[mix]
+    return [tenpin_bench.random_frame(rng, weights, f == 9)
+            for f in range(10)]
+
+def near_valid_string(rng, normal_frames, tenth_frames):
+    """ Returns (frame string, tenth) with a legal frame put through up
+            to three random edits; a fair share are still legal
+    """
+    tenth = rng.random() < 0.5
+    frame = rng.choice(tenth_frames if rng.random() < 0.5 else normal_frames)
+    for edit in range(rng.randint(0, 3)):
+        i = rng.randint(0, len(frame))
+        kind = rng.randint(0, 3)
+        if kind == 0:#insert
+            frame = frame[:i] + rng.choice(_ALPHABET) + frame[i:]
+        elif i == len(frame):
+            continue
+        elif kind == 1:#replace
+            frame = frame[:i] + rng.choice(_ALPHABET) + frame[i + 1:]
+        elif kind == 2:#delete
+            frame = frame[:i] + frame[i + 1:]
+        elif i + 1 < len(frame):#swap
+            frame = frame[:i] + frame[i + 1] + frame[i] + frame[i + 2:]
+    return frame, tenth
+
+
+def _game_failures(frames, engines=None):
+    """ Minimizes and describes the disagreements found for frames """
+    disagreements = check_game(frames, engines)
+    if not disagreements:
+        return []
+    failures = []
+    for name, result, expected in disagreements:
+        engine = [(n, f) for n, f in (engines or ENGINES) if n == name]
+        smallest = minimize_game(frames, lambda game:
+                                 bool(check_game(game, engine)))
+        failures.append("%s gave %r, reference %r, for %r"
+                        %(name, _call(engine[0][1], smallest),
+                          _call(tenpin_core.calculate_current_score,
+                                smallest), smallest))
+    return failures
+
+def _check_games(seed, count):
+    rng = random.Random(seed)
+    normal_frames = tenpin_core.legal_frames(False)
+    tenth_frames = tenpin_core.legal_frames(True)
+    failures = []
+    complete = []
+    checked = 0
+    for g in range(count):
+        checked += 1
+        game = random_game(rng, normal_frames, tenth_frames)
+        complete.append(game)
+        final = tenpin_core.calculate_current_score(game)
+        #part played games as well as complete ones
+        frames = game[:rng.randint(0, 10)]
+        failures.extend(_game_failures(frames))
+        bounds = tenpin_projection.score_bounds(frames)
+        if not bounds.minimum <= final <= bounds.maximum:
+            failures.append("score_bounds gave %r for %r, final score %d"
+                            %(bounds, frames, final))
+        if len(failures) >= MAX_FAILURES_PER_CHUNK:
+            break
+    if numpy is not None:
+        finals, cumulative = tenpin_batch.score_batch(
+                                tenpin_batch.frames_to_array(complete))
+        for game, final, running in zip(complete, finals, cumulative):
+            if final != tenpin_core.calculate_current_score(game):
+                failures.append("score_batch gave %d, reference %d, for %r"
+                                %(final, tenpin_core.calculate_current_score(
+                                                            game), game))
+                break
+            scorer = tenpin_core.FrameScorer()
+            for frame in game:
+                scorer.add_frame(frame)
+            expected = []
+            total = 0
+            for points in scorer.frame_scores:
+                total += points
+                expected.append(total)
+            running = [int(score) for score in running]
+            if running != expected:
+                failures.append("score_batch gave running scores %r, "
+                                "FrameScorer %r, for %r"
+                                %(running, expected, game))
+                break
+    return checked, failures
+
+def _check_strings(seed, count):
+    rng = random.Random(seed)
+    normal_frames = tenpin_core.legal_frames(False)
+    tenth_frames = tenpin_core.legal_frames(True)
+    failures = []
+    checked = 0
+    for s in range(count):
+        checked += 1
+        frame, tenth = near_valid_string(rng, normal_frames, tenth_frames)
+        disagreements = check_frame_string(frame, tenth)
+        for name, result, expected in disagreements:
+            smallest = minimize_string(frame, lambda string: any(
+                                d[0] == name for d in
+                                check_frame_string(string, tenth)))
+            failures.append("%s gave %r for %r (tenth=%s), expected %r"
+                            %(name, _call(getattr(tenpin_core, name),
+                                          smallest, tenth),
+                              smallest, tenth, expected))
+        if len(failures) >= MAX_FAILURES_PER_CHUNK:
+            break
+    return checked, failures
+
+#frames 1 to 7 of the exhaustive games; strikes, so bonuses chain
+_EXHAUSTIVE_PREFIX = [['X']] * 7
+#the eighth frame decides what the ninth and tenth owe it
+_EXHAUSTIVE_EIGHTH = [['X'], ['5', '/'], ['3', '4']]
+
+def _check_tenth(ninth):
+    """ Checks every legal tenth frame after the given ninth frame """
+    failures = []
+    count = 0
+    for eighth in _EXHAUSTIVE_EIGHTH:
+        for tenth in tenpin_core.legal_frames(True):
+            frames = (_EXHAUSTIVE_PREFIX + [eighth, ninth.split(',')]
+                      + [tenth.split(',')])
+            count += 1
+            failures.extend(_game_failures(frames))
+            if len(failures) >= MAX_FAILURES_PER_CHUNK:
+                return count, failures
+    return count, failures
+
+def _check_chunk(task):
+    """ Runs one chunk of the sweep, in a worker process
+
+        task: a tuple of the kind of check ('games', 'strings' or
+            'tenth') and its arguments
+
+        return value: a tuple of (kind, items checked, failures)
+    """
+    kind = task[0]
+    if kind == 'games':
+        count, failures = _check_games(*task[1:])
+    elif kind == 'strings':
+        count, failures = _check_strings(*task[1:])
+    else:
+        count, failures = _check_tenth(*task[1:])
+    return kind, count, failures
+
+def sweep_tasks(num_games, num_strings, seed=0, chunk_size=10000,
+                exhaustive=True):
+    """ Yields the chunks of a sweep, each a task for _check_chunk """
+    chunk = 0
+    for kind, total in (('games', num_games), ('strings', num_strings)):
+        for start in range(0, total, chunk_size):
+            chunk += 1
+            yield (kind, seed * 1000003 + chunk,
+                   min(chunk_size, total - start))
+    if exhaustive:
+        for ninth in tenpin_core.legal_frames(False):
+            yield ('tenth', ninth)
+
+def run_sweep(num_games, num_strings, seed=0, workers=None,
+              chunk_size=10000, exhaustive=True):
+    """ Runs a full sweep, across a pool of worker processes unless
+            workers is 1
+
+        return value: a tuple of a dict of the number of items checked
+            of each kind, and a list of failure descriptions
+    """
+    tasks = sweep_tasks(num_games, num_strings, seed, chunk_size, exhaustive)
+    if workers == 1:
+        results = map(_check_chunk, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap_unordered(_check_chunk, tasks)
+    counts = {}
+    failures = []
+    try:
+        for kind, count, chunk_failures in results:
+            counts[kind] = counts.get(kind, 0) + count
+            failures.extend(chunk_failures)
+        if pool is not None:
+            pool.close()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return counts, failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='check every scoring path against the reference')
+    parser.add_argument('--games', type=int, default=1000000,
+        help='random games to check (default 1000000)')
+    parser.add_argument('--strings', type=int, default=1000000,
+        help='near-valid frame strings to check (default 1000000)')
+    parser.add_argument('--seed', type=int, default=0,
+        help='seed for generation (default 0)')
+    parser.add_argument('--workers', type=int,
+        default=multiprocessing.cpu_count(),
+        help='worker processes (default: number of CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=10000,
+        help='games or strings checked per chunk (default 10000)')
+    parser.add_argument('--no-exhaustive', action='store_true',
+        help='skip the exhaustive check of ninth and tenth frames')
+    args = parser.parse_args()
+    start = time.time()
+    counts, failures = run_sweep(args.games, args.strings, args.seed,
+                                 args.workers, args.chunk_size,
+                                 not args.no_exhaustive)
+    for failure in failures:
+        print(failure)
+    print("checked %s in %.1f seconds: %d disagreements"
+          %(', '.join("%d %s"%(counts[kind], kind) for kind in
+                      sorted(counts)), time.time() - start, len(failures)))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,134 @@
+""" A score sheet that many threads can enter frames into at once
+
+    On a real pair of lanes bowlers don't finish their frames in turn,
+    so a SharedScoreSheet accepts each player's next frame whenever it
+    arrives, from any thread. Each player has a lock of their own,
+    held only while their frame is validated and scored, so threads
+    entering frames for different players never wait on each other;
+    only frames for the same player are serialized, and those must
+    come in order anyway.
+
+    When the last player finishes a frame number, on_all_completed is
+    called with it. A short lock around the count of players through
+    each frame makes sure this happens exactly once per frame number,
+    and in order, however the frames are interleaved.
+"""
+
+import threading
+
+import tenpin_core
+
+
+class _PlayerState(object):
+    """ One player's frames, as a compact tenpin_core.Game, and running
+        score, with the lock guarding them
+    """
+    __slots__ = ('lock', 'frames', 'scorer')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frames = tenpin_core.Game()
+        self.scorer = tenpin_core.FrameScorer()
+
+
+class SharedScoreSheet(object):
+    """ A game's score sheet accepting frames for any player, in any
+        order between players, from any number of threads
+    """
+
+    def __init__(self, player_names, on_frame=None, on_all_completed=None):
+        """ player_names: the names of the players, as returned by
+                collect_player_names
+            on_frame: optionally, a function called with (player index,
+                frame number, the player's FrameScorer) after each frame
+                is accepted; calls for one player come in frame order,
+                and the scorer must only be read during the call
+            on_all_completed: optionally, a function called with a frame
+                number, from 1 to 10, once every player has completed
+                that frame; calls come in frame order
+
+            Both callbacks run while locks are held, so they must not
+            submit frames themselves.
+        """
+        self.player_names = list(player_names)
+        self.on_frame = on_frame
+        self.on_all_completed = on_all_completed
+        #the number of frames every player has completed
+        self.frames_completed = 0
+        self._players = [_PlayerState() for names in self.player_names]
+        #the number of players through each frame
+        self._completed = [0] * 10
+        self._completed_lock = threading.Lock()
+
+    @property
+    def game_over(self):
+        """ True once every player has completed all ten frames """
+        return self.frames_completed == 10
+
+    def submit(self, player_index, frame):
+        """ Enters a player's next frame
+
+            player_index: the player's position in player_names, from 0
+            frame: the frame as entered, such as "5,/", or already
+                parsed into a tuple or list of strings such as ("5","/"),
+                which is validated without being parsed again
+
+            return value: the player's current score after the frame,
+                or None if the value of a strike or spare is still being
+                determined; raises ValueError if the frame is invalid or
+                the player has already completed ten frames
+        """
+        if not 0 <= player_index < len(self._players):
+            raise ValueError("no player number %d"%(player_index + 1))
+        player = self._players[player_index]
+        with player.lock:
+            frame_number = len(player.frames) + 1
+            if frame_number > 10:
+                raise ValueError("player %d has finished"%(player_index + 1))
+            if isinstance(frame, basestring):
+                throws = tenpin_core.parse_frame_score(frame,
+                                                       frame_number == 10)
+            elif tenpin_core.validate_frame_throws(frame, frame_number == 10):
+                throws = frame
+            else:
+                throws = None
+            if throws is None:
+                if not isinstance(frame, basestring):
+                    frame = ','.join(frame)
+                raise ValueError("invalid frame %d: '%s'"
+                                 %(frame_number, frame))
+            player.frames.append_frame(throws)
+            score = player.scorer.add_frame(throws)
+            if self.on_frame is not None:
+                self.on_frame(player_index, frame_number, player.scorer)
+            #taken with the player's lock held, so that one player's
+            #frames are always counted in order
+            with self._completed_lock:
+                self._completed[frame_number - 1] += 1
+                if self._completed[frame_number - 1] == len(self._players):
+                    self.frames_completed = frame_number
+                    if self.on_all_completed is not None:
+                        self.on_all_completed(frame_number)
+        return score
+
+    def frames(self, player_index):
+        """ Returns a copy of a player's frames so far, as a list of
+                lists of strings
+        """
+        player = self._players[player_index]
+        with player.lock:
+            return player.frames.to_frames()
+
+    def score(self, player_index):
+        """ Returns a player's current score, or None if the value of a
+                strike or spare is still being determined
+        """
+        player = self._players[player_index]
+        with player.lock:
+            return player.scorer.score
+
+    def score_sheet(self):
+        """ Returns a copy of every player's frames, in the form the
+                interactive application keeps its score_sheet
+        """
+        return [self.frames(i) for i in range(len(self._players))]
@@ -0,0 +1,338 @@
+""" Keeping games in progress safe across crashes
+
+    Every change to a game (a game started, a frame accepted, a game
+    ended) is appended to a journal file as one line of JSON before it
+    is acted on, e.g.
+
+        [17, "frame", "lane3", 0, "5,/"]
+
+    holding a sequence number, the operation, the game id and its
+    arguments. Each line is handed to the operating system as soon as
+    it is written, so nothing is lost if the process dies; fsync, which
+    is what protects against losing power, is only called once every
+    sync_every records or sync_interval seconds so that it doesn't
+    slow down frame entry.
+
+    Every snapshot_every records the games still in progress are
+    written to a snapshot file, and the journal starts over empty.
+    Opening a Journal loads the snapshot and replays whatever was
+    journaled after it, so recovery never reads more than
+    snapshot_every records no matter how long the journal has been in
+    use. The snapshot records the last sequence number it includes;
+    records at or below it are skipped, so a crash between writing a
+    snapshot and emptying the journal doesn't replay anything twice.
+
+    Running this module directly benchmarks recovery.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+SNAPSHOT_SUFFIX = '.snapshot'
+
+
+class JournalGame(object):
+    """ A game as rebuilt from the journal """
+    __slots__ = ('player_names', 'score_sheet')
+
+    def __init__(self, player_names, score_sheet=None):
+        self.player_names = player_names
+        if score_sheet is None:
+            score_sheet = [[] for names in player_names]
+        self.score_sheet = score_sheet
+
+
+class Journal(object):
+    """ An append-only journal of games in progress, together with the
+        state it describes; games holds every game not yet ended,
+        keyed by game id
+    """
+
+    def __init__(self, path, sync_every=64, sync_interval=1.0,
+                 snapshot_every=10000):
+        """ path: the journal file, created if it doesn't exist; the
+                snapshot is kept next to it with SNAPSHOT_SUFFIX added
+            sync_every: the most records written between fsyncs
+            sync_interval: the most seconds between fsyncs, checked
+                as records are written and by maybe_sync
+            snapshot_every: the number of records after which a
+                snapshot is taken and the journal emptied
+        """
+        self.path = path
+        self.snapshot_path = path + SNAPSHOT_SUFFIX
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        self.games, self.sequence, valid_length = recover(path)
+        #drop a record torn by a crash, so the next one starts on a
+        #line of its own
+        self._file = open(path, 'ab')
+        if os.path.getsize(path) != valid_length:
+            self._file.truncate(valid_length)
+        self._unsynced = 0
+        self._last_sync = time.time()
+        self._since_snapshot = 0
+
+    def new_game(self, game_id, player_names):
+        """ Starts a game, replacing any game in progress with the
+                same id; raises ValueError if the id or a name isn't
+                valid UTF-8, as it couldn't be journaled
+        """
+        _check_utf8(game_id, "game id")
+        for name in player_names:
+            _check_utf8(name, "player name")
+        self._append(['new', game_id, list(player_names)])
+        self.games[game_id] = JournalGame(list(player_names))
+        self._written()
+
+    def add_frame(self, game_id, player_index, frame):
+        """ Records an accepted frame
+
+            game_id: the id given to new_game
+            player_index: the player's position in the game, from 0
+            frame: a list of strings such as ["X"] or ["5","/"]
+
+            Raises ValueError if there is no such game or player.
+        """
+        game = self.games.get(game_id)
+        if game is None:
+            raise ValueError("no game %s in progress"%game_id)
+        if not 0 <= player_index < len(game.score_sheet):
+            raise ValueError("no player number %d in game %s"
+                             %(player_index + 1, game_id))
+        self._append(['frame', game_id, player_index, ','.join(frame)])
+        game.score_sheet[player_index].append(list(frame))
+        self._written()
+
+    def end_game(self, game_id):
+        """ Forgets a finished or abandoned game; raises ValueError if
+                there is no such game
+        """
+        if game_id not in self.games:
+            raise ValueError("no game %s in progress"%game_id)
+        self._append(['end', game_id])
+        del self.games[game_id]
+        self._written()
+
+    def _append(self, record):
+        line = json.dumps([self.sequence + 1] + record, separators=(',', ':'))
+        self.sequence += 1
+        self._file.write(line + '\n')
+        self._file.flush()
+
+    def _written(self):
+        """ Syncs or snapshots as due once a record has been written
+                and applied to games
+        """
+        self._unsynced += 1
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+        elif self._unsynced >= self.sync_every:
+            self.sync()
+        else:
+            self.maybe_sync()
+
+    def maybe_sync(self):
+        """ Calls sync if records have waited longer than sync_interval """
+        if self._unsynced and time.time() - self._last_sync >= \
+                self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        """ Forces every record written so far onto disk """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.time()
+
+    def snapshot(self):
+        """ Writes every game in progress to the snapshot file and
+                empties the journal
+        """
+        state = {'sequence': self.sequence,
+                 'games': dict((game_id, [game.player_names,
+                                          game.score_sheet])
+                               for game_id, game in self.games.items())}
+        temporary_path = self.snapshot_path + '.tmp'
+        with open(temporary_path, 'wb') as snapshot_file:
+            json.dump(state, snapshot_file, separators=(',', ':'))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.rename(temporary_path, self.snapshot_path)
+        #the rename is only durable once the directory is synced, and
+        #the journal mustn't be emptied before then
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)),
+                            os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        self._file.truncate(0)
+        self.sync()
+        self._since_snapshot = 0
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _check_utf8(text, description):
+    """ Raises ValueError unless text is unicode or a UTF-8 str, which
+            is all json can write
+    """
+    if isinstance(text, str):
+        try:
+            text.decode('utf-8')
+        except UnicodeDecodeError:
+            raise ValueError("%s %r is not valid UTF-8"%(description, text))
+
+
+def _encoded(value):
+    """ Returns value as loaded by json with every unicode string in it
+            encoded to a UTF-8 str, like the names it was written from
+    """
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if isinstance(value, list):
+        return [_encoded(item) for item in value]
+    if isinstance(value, dict):
+        return dict((_encoded(key), _encoded(item))
+                    for key, item in value.items())
+    return value
+
+
+def recover(path):
+    """ Rebuilds the games in progress from a journal and its snapshot
+
+        Records that can't be applied, such as a frame for a game that
+        was never started, are skipped.
+
+        return value: a (games, last sequence number, length of the
+            journal up to the end of its last complete record) tuple,
+            games being a dict of JournalGame keyed by game id
+    """
+    games = {}
+    sequence = 0
+    snapshot_path = path + SNAPSHOT_SUFFIX
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, 'rb') as snapshot_file:
+            state = _encoded(json.load(snapshot_file))
+        sequence = state['sequence']
+        for game_id, (player_names, score_sheet) in state['games'].items():
+            games[game_id] = JournalGame(player_names, score_sheet)
+    valid_length = 0
+    if not os.path.exists(path):
+        return games, sequence, valid_length
+    with open(path, 'rb') as journal_file:
+        for line in journal_file:
+            if not line.endswith('\n'):
+                break#torn by a crash part way through writing it
+            try:
+                record = _encoded(json.loads(line))
+            except ValueError:
+                break
+            valid_length += len(line)
+            try:
+                if record[0] <= sequence:
+                    continue#already in the snapshot
+                sequence = record[0]
+                operation, game_id = record[1], record[2]
+                if operation == 'new':
+                    games[game_id] = JournalGame(list(record[3]))
+                elif operation == 'frame':
+                    score_sheet = games[game_id].score_sheet
+                    if 0 <= record[3] < len(score_sheet):
+                        score_sheet[record[3]].append(record[4].split(','))
+                elif operation == 'end':
+                    games.pop(game_id, None)
+            except (KeyError, IndexError, TypeError, AttributeError):
+                continue#doesn't apply to the games as rebuilt so far
+    return games, sequence, valid_length
+
+
+def benchmark(num_games, snapshot_every, path):
+    """ Journals num_games games part way through, then times
+            recovering them
+
+        return value: a dict of the records journaled, the rate they
+            were written at and the seconds taken to recover, with and
+            without the snapshot; the files used are removed
+            afterwards
+    """
+    import tenpin_bench
+    rng = random.Random(0)
+    for stale in (path, path + SNAPSHOT_SUFFIX, path + '.full'):
+        if os.path.exists(stale):
+            os.unlink(stale)
+    journal = Journal(path, snapshot_every=snapshot_every)
+    records = 0
+    start = time.time()
+    for game_number in range(num_games):
+        game_id = 'game%d'%game_number
+        players = tenpin_bench.random_games(rng.randint(1, 4), 'mixed',
+                                            game_number)
+        journal.new_game(game_id, ['player%d'%p for p in
+                                   range(len(players))])
+        frames_entered = rng.randint(1, 9)
+        for f in range(frames_entered):
+            for p, frames in enumerate(players):
+                journal.add_frame(game_id, p, frames[f])
+        records += 1 + frames_entered * len(players)
+    expected = dict((game_id, game.score_sheet)
+                    for game_id, game in journal.games.items())
+    journal.close()
+    write_time = time.time() - start
+
+    start = time.time()
+    games = recover(path)[0]
+    recover_time = time.time() - start
+    if dict((game_id, game.score_sheet)
+            for game_id, game in games.items()) != expected:
+        raise AssertionError("recovered games differ from those journaled")
+    #replaying everything, as if no snapshot had ever been taken
+    journal = Journal(path + '.full', snapshot_every=records + 1)
+    for game_id, game in sorted(games.items()):
+        journal.new_game(game_id, game.player_names)
+        for p, frames in enumerate(game.score_sheet):
+            for frame in frames:
+                journal.add_frame(game_id, p, frame)
+    journal.close()
+    start = time.time()
+    recover(path + '.full')
+    full_time = time.time() - start
+    for used in (path, path + SNAPSHOT_SUFFIX, path + '.full'):
+        if os.path.exists(used):
+            os.unlink(used)
+    return {'records': records,
+            'records_per_second': records / write_time,
+            'recovery_seconds': recover_time,
+            'full_replay_seconds': full_time}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='benchmark journal writing and crash recovery')
+    parser.add_argument('--games', type=int, default=10000,
+        help='number of games left in progress (default 10000)')
+    parser.add_argument('--snapshot-every', type=int, default=10000,
+        help='records between snapshots (default 10000)')
+    parser.add_argument('--path', default='tenpin_journal_bench.log',
+        help='journal file to use (default tenpin_journal_bench.log)')
+    args = parser.parse_args()
+    results = benchmark(args.games, args.snapshot_every, args.path)
+    print("%d records journaled at %.0f records/second"
+          %(results['records'], results['records_per_second']))
+    print("recovery from snapshot and journal: %.3f seconds"
+          %results['recovery_seconds'])
+    print("recovery replaying every record:    %.3f seconds"
+          %results['full_replay_seconds'])
@@ -0,0 +1,134 @@
+""" Load test for tenpin_server: many simulated lanes at once
+
+    Each simulated lane opens its own connection, starts a game and
+    enters random valid frames for all of its players, sending the
+    next request as soon as the previous reply arrives. The time from
+    sending each FRAME request to receiving its reply is recorded, and
+    the 50th and 99th percentile latencies are reported at the end.
+"""
+
+import argparse
+import asynchat
+import asyncore
+import random
+import socket
+import time
+
+import tenpin_core
+import tenpin_server
+
+
+def random_game(rng):
+    """ Returns ten random valid frame strings for one player """
+    normal = tenpin_core.legal_frames(False)
+    return ([rng.choice(normal) for f in range(9)]
+            + [rng.choice(tenpin_core.legal_frames(True))])
+
+def lane_requests(lane, num_players, rng):
+    """ Returns the request lines one simulated lane sends, in order """
+    names = ['player%d'%(p + 1) for p in range(num_players)]
+    games = [random_game(rng) for name in names]
+    requests = ["NEW %s %s"%(lane, '|'.join(names))]
+    for f in range(10):
+        for p in range(num_players):
+            requests.append("FRAME %s %d %s"%(lane, p + 1, games[p][f]))
+    requests.append("END %s"%lane)
+    return requests
+
+def percentile(values, fraction):
+    """ Returns the nearest-rank percentile of a sorted list of values """
+    if not values:
+        return None
+    rank = int(round(fraction * len(values) + 0.5)) - 1
+    return values[max(0, min(rank, len(values) - 1))]
+
+
+class LaneClient(asynchat.async_chat):
+    """ One simulated lane, sending each request once the last one
+        has been answered
+    """
+
+    def __init__(self, address, requests, results, map):
+        asynchat.async_chat.__init__(self, map=map)
+        self.requests = requests
+        self.results = results
+        self.set_terminator('\n')
+        self._incoming = []
+        self._next = 0
+        self._sent_at = None
+        family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+        self.create_socket(family, socket.SOCK_STREAM)
+        self.connect(address)
+
+    def handle_connect(self):
+        self._send_next()
+
+    def _send_next(self):
+        if self._next == len(self.requests):
+            self.close()
+            return
+        self._sent_at = time.time()
+        self.push(self.requests[self._next] + '\n')
+        self._next += 1
+
+    def handle_error(self):
+        #a lane that can't reach the server just stops
+        self.results['errors'] += 1
+        self.close()
+
+    def collect_incoming_data(self, data):
+        self._incoming.append(data)
+
+    def found_terminator(self):
+        reply = ''.join(self._incoming)
+        self._incoming = []
+        if reply.startswith('ERR'):
+            self.results['errors'] += 1
+        elif reply.startswith('SCORE'):
+            self.results['latencies'].append(time.time() - self._sent_at)
+        self._send_next()
+
+
+def run_load_test(address, lanes, players, seed):
+    """ Runs lanes simulated lanes of players players each against the
+            server at address ("host:port" or a socket path)
+
+        return value: a dict of frames submitted, errors, elapsed
+            seconds, and p50/p99 frame latency in milliseconds
+    """
+    rng = random.Random(seed)
+    results = {'latencies': [], 'errors': 0}
+    client_map = {}
+    address = tenpin_server.parse_address(address)
+    for lane in range(1, lanes + 1):
+        LaneClient(address, lane_requests(lane, players, rng), results,
+                   client_map)
+    start = time.time()
+    asyncore.loop(timeout=1, use_poll=True, map=client_map)
+    elapsed = time.time() - start
+    latencies = [seconds * 1000 for seconds in sorted(results['latencies'])]
+    return {'frames': len(latencies),
+            'errors': results['errors'],
+            'seconds': elapsed,
+            'p50_ms': percentile(latencies, 0.50),
+            'p99_ms': percentile(latencies, 0.99)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='simulate many lanes against a running scoring server')
+    parser.add_argument('address',
+        help="server address, as 'host:port' or a Unix socket path")
+    parser.add_argument('--lanes', type=int, default=200,
+        help='number of simultaneous lanes (default 200)')
+    parser.add_argument('--players', type=int, default=4,
+        help='players per lane, 1 to 9 (default 4)')
+    parser.add_argument('--seed', type=int, default=0,
+        help='seed for the random frames entered (default 0)')
+    args = parser.parse_args()
+    report = run_load_test(args.address, args.lanes, args.players, args.seed)
+    print("%d frames from %d lanes in %.2fs (%d errors)"
+          %(report['frames'], args.lanes, report['seconds'], report['errors']))
+    if report['frames']:
+        print("frame latency p50 %.3fms p99 %.3fms"
+              %(report['p50_ms'], report['p99_ms']))
@@ -0,0 +1,119 @@
+""" Scoring of large game files across several processes
+
+    Input lines (in the format read by tenpin_bulk) are grouped into
+    chunks, each chunk is parsed, validated and scored in a worker
+    process, and the results are written back out in input order.
+    Only a few chunks per worker are in flight at once, so memory use
+    stays bounded however large the input is.
+
+    Running this module directly benchmarks throughput from one worker
+    up to one per CPU core.
+"""
+
+import argparse
+import collections
+import multiprocessing
+import time
+
+import tenpin_bulk
+
+
+def _score_chunk(chunk):
+    """ Scores a list of (line number, line) pairs in a worker process
+
+        return value: a list of (line number, name, score, error)
+            tuples, as yielded by tenpin_bulk.score_games
+    """
+    return list(tenpin_bulk.score_games(tenpin_bulk.parse_games(chunk)))
+
+def chunked(iterable, size):
+    """ Yields lists of up to size consecutive items from iterable """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def score_games_parallel(numbered_lines, workers=None, chunk_size=1000):
+    """ Scores games across a pool of worker processes
+
+        numbered_lines: an iterable of (line number, line) pairs,
+            e.g. from tenpin_bulk.number_lines
+        workers: number of worker processes; defaults to one per CPU
+        chunk_size: number of lines sent to a worker at a time
+
+        return value: a generator of (line number, name, score, error)
+            tuples in input order, as yielded by tenpin_bulk.score_games;
+            raises ValueError if workers or chunk_size is less than 1
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    pool = multiprocessing.Pool(workers)
+    #a couple of chunks per worker keeps them all busy while we write
+    in_flight = collections.deque()
+    try:
+        for chunk in chunked(numbered_lines, chunk_size):
+            in_flight.append(pool.apply_async(_score_chunk, (chunk,)))
+            if len(in_flight) >= 2 * workers:
+                for result in in_flight.popleft().get():
+                    yield result
+        while in_flight:
+            for result in in_flight.popleft().get():
+                yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+def run_parallel(infile, outfile, errfile, workers=None, chunk_size=1000):
+    """ Scores every game in infile across a pool of worker processes,
+            writing results just as tenpin_bulk.run_bulk does
+
+        return value: a tuple of (games scored, lines rejected)
+    """
+    return tenpin_bulk.write_results(
+                    score_games_parallel(tenpin_bulk.number_lines(infile),
+                                         workers, chunk_size),
+                    outfile, errfile)
+
+def benchmark(num_games, max_workers, chunk_size):
+    """ Times scoring num_games games with 1 up to max_workers workers
+
+        return value: a list of (workers, games per second) pairs
+    """
+    fixtures = ["perfect|X|X|X|X|X|X|X|X|X|X,X,X",
+                "alternate|X|0,0|X|0,/|X|0,0|X|0,/|X|0,/,0",
+                "spares|1,2|3,4|5,/|1,2|3,4|5,/|1,2|3,4|5,/|3,/,X",
+                "mixed|7,/|X|3,0|3,4|X|X|1,/|9,0|X|X,3,/"]
+    lines = [(i + 1, fixtures[i % len(fixtures)]) for i in range(num_games)]
+    rates = []
+    for workers in range(1, max_workers + 1):
+        start = time.time()
+        for result in score_games_parallel(lines, workers, chunk_size):
+            pass
+        rates.append((workers, num_games / (time.time() - start)))
+    return rates
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='benchmark parallel scoring from 1 to N workers')
+    parser.add_argument('--games', type=int, default=400000,
+        help='number of games to score per run (default 400000)')
+    parser.add_argument('--max-workers', type=int,
+        default=multiprocessing.cpu_count(),
+        help='largest worker count to try (default: number of CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+        help='lines sent to a worker at a time (default 1000)')
+    args = parser.parse_args()
+    rates = benchmark(args.games, args.max_workers, args.chunk_size)
+    for workers, rate in rates:
+        print("%3d workers %12.0f games/second %6.2fx"
+              %(workers, rate, rate / rates[0][1]))
@@ -0,0 +1,148 @@
+""" Opt-in timing of the stages of the scoring pipeline
+
+    When enabled (with --profile or by setting the TENPIN_PROFILE
+    environment variable), the functions behind each stage are replaced
+    with wrappers that count calls, add up time spent and keep a
+    histogram of call latencies. When it isn't enabled nothing is
+    replaced, so there is no cost at all.
+
+    A summary is written to stderr when the process exits, and at any
+    time on receiving SIGUSR1.
+
+    Times are inclusive: calculate_current_score's time includes the
+    next_throws_value calls it makes.
+
+    Only the process that enabled profiling is timed; worker processes
+    started by tenpin_parallel would keep their timings to themselves,
+    so tenpin.py refuses to profile --bulk with more than one worker.
+"""
+
+import atexit
+import signal
+import sys
+import time
+
+#(module, class or None, function, stage name) for every stage timed
+STAGES = [('tenpin_core', None, 'parse_frame_score', 'parse'),
+          ('tenpin_core', None, 'validate_frame_score', 'validate'),
+          ('tenpin_core', None, 'next_throws_value', 'next_throws_value'),
+          ('tenpin_core', None, 'calculate_current_score', 'calculate_score'),
+          ('tenpin_core', 'FrameScorer', 'add_frame', 'frame_scorer'),
+          ('tenpin', None, 'format_frame_report', 'output'),
+          ('tenpin_bulk', None, 'parse_game_line', 'bulk_parse'),
+          ('tenpin_projection', None, 'scorer_bounds', 'projection')]
+
+#latencies are counted in buckets of up to 1us, 2us, 4us, ... 2**31us
+HISTOGRAM_BUCKETS = 32
+
+
+class StageStats(object):
+    """ Call count, total time and latency histogram for one stage """
+    __slots__ = ('calls', 'seconds', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def record(self, seconds):
+        self.calls += 1
+        self.seconds += seconds
+        bucket = int(seconds * 1000000).bit_length()
+        self.histogram[min(bucket, HISTOGRAM_BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        """ Returns the upper bound in microseconds of the histogram
+                bucket holding the given fraction of calls
+        """
+        wanted = fraction * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= wanted:
+                return 2 ** bucket
+        return 0
+
+
+class Profiler(object):
+    """ Collects StageStats for every function it instruments """
+
+    def __init__(self):
+        self.stages = {}
+
+    def instrument(self, owner, name, stage):
+        """ Replaces the function owner.name (owner being a module or a
+                class) with a wrapper that times every call under stage
+        """
+        function = getattr(owner, name)
+        stats = self.stages.setdefault(stage, StageStats())
+        now = time.time
+        def timed(*args, **kwargs):
+            start = now()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.record(now() - start)
+        timed.__name__ = function.__name__
+        timed.__doc__ = function.__doc__
+        setattr(owner, name, timed)
+
+    def summary(self):
+        """ Returns a table of every stage's statistics as a string """
+        lines = ["%-18s %10s %12s %10s %10s %10s"
+                 %('stage', 'calls', 'total ms', 'mean us', 'p50 us',
+                   'p99 us')]
+        for stage, stats in sorted(self.stages.items()):
+            if not stats.calls:
+                continue
+            lines.append("%-18s %10d %12.3f %10.2f %10d %10d"
+                         %(stage, stats.calls, stats.seconds * 1000,
+                           stats.seconds * 1000000 / stats.calls,
+                           stats.percentile(0.5), stats.percentile(0.99)))
+            lines.append("%18s %s"%('', ' '.join(
+                            "<=%dus:%d"%(2 ** bucket, count)
+                            for bucket, count in enumerate(stats.histogram)
+                            if count)))
+        return '\n'.join(lines)
+
+    def dump(self, stream=None):
+        """ Writes the summary to stream, stderr by default """
+        stream = stream if stream is not None else sys.stderr
+        stream.write("tenpin profile:\n" + self.summary() + "\n")
+        stream.flush()
+
+
+def enable(main_module=None):
+    """ Instruments every stage and arranges for a summary on exit
+            and on SIGUSR1
+
+        main_module: the module running as __main__, when that is
+            tenpin.py itself, so the names the interactive loop calls
+            are instrumented without importing tenpin.py a second time
+
+        return value: the Profiler collecting the statistics
+    """
+    import tenpin_core
+    import tenpin_bulk
+    import tenpin_projection
+    if main_module is None:
+        import tenpin as main_module
+    modules = {'tenpin_core': tenpin_core,
+               'tenpin': main_module,
+               'tenpin_bulk': tenpin_bulk,
+               'tenpin_projection': tenpin_projection}
+    profiler = Profiler()
+    for module_name, class_name, name, stage in STAGES:
+        module = modules[module_name]
+        owner = module if class_name is None else getattr(module, class_name)
+        profiler.instrument(owner, name, stage)
+        #tenpin re-exports the core functions under names of its own
+        if (module is tenpin_core and class_name is None
+                and hasattr(main_module, name)):
+            setattr(main_module, name, getattr(tenpin_core, name))
+    atexit.register(profiler.dump)
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.dump())
+        #let a read waiting on input carry on after the summary is dumped
+        signal.siginterrupt(signal.SIGUSR1, False)
+    return profiler
@@ -0,0 +1,142 @@
+""" Bounds on, and the distribution of, a game's possible final scores
+
+    Rather than trying every way the rest of a game could go, the
+    remaining frames are worked through by dynamic programming. What
+    the rest of a game can add to a score depends only on how many
+    frames are left and which strikes and spares are still waiting on
+    bonus throws, so there are only a few dozen distinct subproblems.
+    Their answers are kept in a table shared by every player and game,
+    so after the first call projections cost next to nothing.
+"""
+
+from collections import namedtuple
+
+import tenpin_core
+
+ScoreBounds = namedtuple('ScoreBounds', ['current', 'minimum', 'maximum'])
+
+#(frames completed, pending bonuses) -> {points still to come: ways}
+_DISTRIBUTIONS = {}
+
+
+def _frame_outcomes(tenth):
+    """ Lists every way a frame can be thrown as a tuple of pin counts """
+    outcomes = []
+    for first in range(11):
+        if first == 10:
+            if not tenth:
+                outcomes.append((10,))
+                continue
+            for second in range(11):
+                standing = 10 if second == 10 else 10 - second
+                for third in range(standing + 1):
+                    outcomes.append((10, second, third))
+            continue
+        for second in range(11 - first):
+            if first + second < 10 or not tenth:
+                outcomes.append((first, second))
+            else:
+                for third in range(11):
+                    outcomes.append((first, second, third))
+    return outcomes
+
+_NORMAL_OUTCOMES = _frame_outcomes(False)
+_TENTH_OUTCOMES = _frame_outcomes(True)
+
+
+def _grouped_outcomes(pending, tenth):
+    """ Groups the ways a frame can be thrown by what they lead to
+
+        pending: a tuple of the bonus throws still needed by each
+            earlier strike or spare, oldest first
+
+        return value: a dict mapping (points added, pending afterwards)
+            to the number of ways the frame can be thrown for them
+    """
+    groups = {}
+    for throws in (_TENTH_OUTCOMES if tenth else _NORMAL_OUTCOMES):
+        points = sum(throws)
+        waiting = pending
+        for pins in throws:
+            if not waiting:
+                break
+            points += pins * len(waiting)
+            waiting = tuple(needed - 1 for needed in waiting if needed > 1)
+        if not tenth:
+            if throws[0] == 10:
+                waiting += (2,)
+            elif sum(throws) == 10:
+                waiting += (1,)
+        key = (points, waiting)
+        groups[key] = groups.get(key, 0) + 1
+    return groups
+
+def _remaining_distribution(completed, pending):
+    """ Returns {points still to come: number of ways} for a game with
+            completed frames done and pending bonuses outstanding
+    """
+    key = (completed, pending)
+    distribution = _DISTRIBUTIONS.get(key)
+    if distribution is not None:
+        return distribution
+    if completed == 10:
+        distribution = {0: 1}
+    else:
+        distribution = {}
+        for (points, waiting), ways in _grouped_outcomes(
+                                    pending, completed == 9).items():
+            rest = _remaining_distribution(completed + 1, waiting)
+            for more, rest_ways in rest.items():
+                total = points + more
+                distribution[total] = (distribution.get(total, 0)
+                                       + ways * rest_ways)
+    _DISTRIBUTIONS[key] = distribution
+    return distribution
+
+def _scorer_for(frames):
+    """ Returns a FrameScorer that has been given every frame in frames """
+    if len(frames) > 10:
+        raise ValueError("a game has at most 10 frames")
+    scorer = tenpin_core.FrameScorer()
+    for frame in frames:
+        scorer.add_frame(frame)
+    return scorer
+
+def _remaining(scorer):
+    """ Returns (points already certain, {points still to come: ways})
+            for the game recorded so far by scorer
+    """
+    certain = sum(points for points in scorer.frame_scores
+                  if points is not None)
+    certain += sum(points for points, needed in scorer.pending)
+    pending = tuple(needed for points, needed in scorer.pending)
+    return certain, _remaining_distribution(scorer.frames_completed, pending)
+
+def score_distribution(frames):
+    """ Returns every final score a partly played game can still reach
+
+        frames: a list of lists of strings, as stored in a score sheet,
+            holding the frames played so far
+
+        return value: a dict mapping each reachable final score to the
+            number of different ways the remaining throws could go
+            to reach it
+    """
+    certain, remaining = _remaining(_scorer_for(frames))
+    return dict((certain + points, ways)
+                for points, ways in remaining.items())
+
+def score_bounds(frames):
+    """ Returns a ScoreBounds of the current score (None while it is
+            unavailable, as from calculate_current_score), the lowest
+            final score still possible and the highest
+    """
+    return scorer_bounds(_scorer_for(frames))
+
+def scorer_bounds(scorer):
+    """ Returns a ScoreBounds, as from score_bounds, for the frames
+            already given to a FrameScorer
+    """
+    certain, remaining = _remaining(scorer)
+    return ScoreBounds(scorer.score, certain + min(remaining),
+                       certain + max(remaining))
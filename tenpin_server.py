@@ -0,0 +1,236 @@
+""" A scoring server for many lanes at once
+
+    Lanes connect over TCP or a Unix socket and talk a simple line
+    protocol; every request is one line and gets one line in reply:
+
+        NEW <lane> <name>|<name>|...    start a game of 1 to 9 players on
+                                        a lane with no game in progress
+                                        -> OK <lane> <number of players>
+        FRAME <lane> <player> <frame>   enter the next frame for player
+                                        number <player> (counting from 1)
+                                        -> SCORE <lane> <player> <frame
+                                           number> <current score, or -
+                                           while it is unavailable>
+        END <lane>                      forget a lane's game
+                                        -> OK <lane>
+
+    Anything that can't be accepted is answered with "ERR <problem>".
+
+    All lanes are served from a single asyncore event loop, so a slow
+    or idle lane never holds up the others.
+"""
+
+import asynchat
+import asyncore
+import os
+import socket
+import stat
+
+import tenpin_core
+
+#the longest request line we will buffer before giving up on a client
+MAX_LINE_LENGTH = 1024
+
+
+class LaneGame(object):
+    """ The game in progress on one lane, with each player's frames
+        kept as a compact tenpin_core.Game
+    """
+    __slots__ = ('player_names', 'score_sheet', 'scorers')
+
+    def __init__(self, player_names):
+        self.player_names = player_names
+        self.score_sheet = [tenpin_core.Game() for names in player_names]
+        self.scorers = [tenpin_core.FrameScorer() for names in player_names]
+
+
+class ScoringService(object):
+    """ Holds every lane's game and answers protocol requests;
+        kept apart from the networking so it can be used directly
+    """
+
+    def __init__(self, journal=None):
+        """ journal: optionally, a tenpin_journal.Journal that every
+                change is written to first; lanes with games still in
+                progress in it are restored
+        """
+        self.lanes = {}
+        self.journal = journal
+        if journal is not None:
+            for lane, journaled in journal.games.items():
+                game = self.lanes[lane] = LaneGame(journaled.player_names)
+                for player_index, frames in enumerate(journaled.score_sheet):
+                    for frame in frames:
+                        game.score_sheet[player_index].append_frame(frame)
+                        game.scorers[player_index].add_frame(frame)
+
+    def handle_line(self, line):
+        """ Answers one request line
+
+            line: a request line without its trailing newline
+
+            return value: the reply line, without a trailing newline
+        """
+        parts = line.split(None, 1)
+        command = parts[0].upper() if parts else ''
+        try:
+            if command == 'NEW':
+                return self.new_game(*parts[1].split(None, 1))
+            if command == 'FRAME':
+                return self.add_frame(*parts[1].split(None, 2))
+            if command == 'END':
+                return self.end_game(*parts[1].split())
+        except (IndexError, TypeError):
+            return "ERR wrong number of arguments for %s"%command
+        except ValueError as e:
+            return "ERR %s"%e
+        return "ERR unknown command '%s'"%command
+
+    def new_game(self, lane, names):
+        """ Starts a game on lane for the '|' separated player names;
+                a lane's game must be ended before another is started
+        """
+        if lane in self.lanes:
+            raise ValueError("lane %s already has a game in progress"%lane)
+        player_names = names.split('|')
+        if len(player_names) > 9:
+            raise ValueError("a game has at most 9 players")
+        if self.journal is not None:
+            self.journal.new_game(lane, player_names)
+        self.lanes[lane] = LaneGame(player_names)
+        return "OK %s %d"%(lane, len(player_names))
+
+    def add_frame(self, lane, player, frame):
+        """ Validates and records the next frame for a player on lane """
+        game = self.lanes.get(lane)
+        if game is None:
+            raise ValueError("no game on lane %s"%lane)
+        try:
+            player_index = int(player) - 1
+        except ValueError:
+            raise ValueError("invalid player number '%s'"%player)
+        if not 0 <= player_index < len(game.player_names):
+            raise ValueError("no player number %s on lane %s"%(player, lane))
+        sheet = game.score_sheet[player_index]
+        if len(sheet) == 10:
+            raise ValueError("player %s on lane %s has finished"
+                             %(player, lane))
+        throws = tenpin_core.parse_frame_score(frame, len(sheet) == 9)
+        if throws is None:
+            raise ValueError("invalid frame %d: '%s'"%(len(sheet) + 1, frame))
+        if self.journal is not None:
+            self.journal.add_frame(lane, player_index, throws)
+        sheet.append_frame(throws)
+        score = game.scorers[player_index].add_frame(throws)
+        return "SCORE %s %s %d %s"%(lane, player, len(sheet),
+                                    '-' if score is None else score)
+
+    def end_game(self, lane):
+        """ Forgets the game on lane """
+        if lane not in self.lanes:
+            raise ValueError("no game on lane %s"%lane)
+        if self.journal is not None:
+            self.journal.end_game(lane)
+        del self.lanes[lane]
+        return "OK %s"%lane
+
+
+class ScoringChannel(asynchat.async_chat):
+    """ One connected client, answering each line as it arrives """
+
+    def __init__(self, sock, service, map=None):
+        asynchat.async_chat.__init__(self, sock, map)
+        self.service = service
+        self.set_terminator('\n')
+        self._incoming = []
+        self._incoming_length = 0
+
+    def collect_incoming_data(self, data):
+        self._incoming_length += len(data)
+        if self._incoming_length > MAX_LINE_LENGTH:
+            self.push("ERR line too long\n")
+            self.close_when_done()
+            return
+        self._incoming.append(data)
+
+    def found_terminator(self):
+        line = ''.join(self._incoming).rstrip('\r')
+        self._incoming = []
+        self._incoming_length = 0
+        if line:
+            self.push(self.service.handle_line(line) + '\n')
+
+
+class ScoringServer(asyncore.dispatcher):
+    """ Listens on address and hands each connection a ScoringChannel
+
+        address: a (host, port) tuple for TCP,
+            or a filesystem path for a Unix socket; a socket left
+            behind at the path is replaced, but any other file there
+            raises ValueError rather than being deleted
+    """
+
+    def __init__(self, address, service=None, map=None):
+        asyncore.dispatcher.__init__(self, map=map)
+        self.service = service if service is not None else ScoringService()
+        #the Unix socket file this server created, for serve to remove
+        self.socket_path = None
+        if isinstance(address, tuple):
+            self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.set_reuse_addr()
+        else:
+            if os.path.exists(address):
+                if not stat.S_ISSOCK(os.stat(address).st_mode):
+                    raise ValueError("%s exists and is not a socket"
+                                     %address)
+                os.unlink(address)#left behind by an earlier server
+            self.create_socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.bind(address)
+        if not isinstance(address, tuple):
+            self.socket_path = address
+        self.listen(128)
+
+    def handle_accept(self):
+        pair = self.accept()
+        if pair is not None:
+            ScoringChannel(pair[0], self.service, self._map)
+
+
+def parse_address(address):
+    """ Turns "host:port" into a (host, port) tuple for TCP;
+            anything else is taken as a Unix socket path
+    """
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return (host or 'localhost', int(port))
+    return address
+
+def serve(address, journal_path=None):
+    """ Serves lanes on address ("host:port" or a socket path)
+            until interrupted
+
+        journal_path: optionally, a journal file to keep games in
+            progress in, resuming any found there
+    """
+    address = parse_address(address)
+    journal = None
+    if journal_path is not None:
+        import tenpin_journal
+        journal = tenpin_journal.Journal(journal_path)
+    server = ScoringServer(address, ScoringService(journal))
+    try:
+        if journal is None:
+            asyncore.loop(use_poll=True)
+        else:
+            #wake up now and then so that the last frames entered before
+            #a lull still get their fsync
+            while asyncore.socket_map:
+                asyncore.loop(timeout=journal.sync_interval, use_poll=True,
+                              count=1)
+                journal.maybe_sync()
+    finally:
+        server.close()
+        if journal is not None:
+            journal.close()
+        if server.socket_path is not None:
+            os.unlink(server.socket_path)
@@ -0,0 +1,255 @@
+""" League statistics kept up to date as games are completed
+
+    Completed games are indexed by player name and by date, and each
+    player's aggregates (games, pins, strikes and spares with the
+    chances at them, high game, high series and the points scored in
+    each of the ten frames) are updated as every game is added, so
+    no query ever rescans a player's games or rescores a frame.
+
+    A series is all of a player's games on one date, as bowled on a
+    league night. Dates can be datetime.date objects or ISO format
+    strings such as '2024-01-31', as long as one kind is used
+    throughout, and are compared to answer date range queries.
+
+    The high game leaderboard keeps only the best leaderboard_size
+    games in a heap, so it stays the same size however many games are
+    added.
+"""
+
+import bisect
+import heapq
+from collections import namedtuple
+
+import tenpin_core
+
+CompletedGame = namedtuple('CompletedGame', ['game_id', 'player', 'date',
+                                             'frames', 'score'])
+
+
+class PlayerStats(object):
+    """ Running aggregates over every game one player has completed """
+    __slots__ = ('games', 'pins', 'strikes', 'strike_chances', 'spares',
+                 'spare_chances', 'high_game', 'high_series',
+                 'frame_points', 'series', 'series_dates', 'game_ids')
+
+    def __init__(self):
+        self.games = 0
+        self.pins = 0
+        self.strikes = 0
+        self.strike_chances = 0
+        self.spares = 0
+        self.spare_chances = 0
+        self.high_game = 0
+        self.high_series = 0
+        #total points scored in each frame, for frame by frame splits
+        self.frame_points = [0] * 10
+        #date -> [games, pins] for that date's series
+        self.series = {}
+        #the dates in series, sorted for range queries
+        self.series_dates = []
+        self.game_ids = []
+
+    @property
+    def average(self):
+        """ Pins per game, or None before any games are completed """
+        if not self.games:
+            return None
+        return self.pins / float(self.games)
+
+    @property
+    def strike_percentage(self):
+        """ Strikes as a percentage of throws at a full rack """
+        if not self.strike_chances:
+            return None
+        return 100.0 * self.strikes / self.strike_chances
+
+    @property
+    def spare_percentage(self):
+        """ Spares as a percentage of chances to pick up a spare """
+        if not self.spare_chances:
+            return None
+        return 100.0 * self.spares / self.spare_chances
+
+    @property
+    def frame_averages(self):
+        """ A list of the average points scored in each frame """
+        if not self.games:
+            return None
+        return [points / float(self.games) for points in self.frame_points]
+
+    def average_between(self, start=None, end=None):
+        """ Pins per game over the series bowled from start to end
+                inclusive, either of which may be None for no limit
+
+            return value: the average, or None without games in range
+        """
+        dates = self.series_dates
+        first = 0 if start is None else bisect.bisect_left(dates, start)
+        last = len(dates) if end is None else bisect.bisect_right(dates, end)
+        games = pins = 0
+        for date in dates[first:last]:
+            series_games, series_pins = self.series[date]
+            games += series_games
+            pins += series_pins
+        if not games:
+            return None
+        return pins / float(games)
+
+    def _add(self, game_id, date, frames, frame_scores):
+        score = sum(frame_scores)
+        self.games += 1
+        self.pins += score
+        self.game_ids.append(game_id)
+        if score > self.high_game:
+            self.high_game = score
+        for f, points in enumerate(frame_scores):
+            self.frame_points[f] += points
+        for frame in frames:
+            strikes, strike_chances, spares, spare_chances = \
+                                                    _frame_counts(frame)
+            self.strikes += strikes
+            self.strike_chances += strike_chances
+            self.spares += spares
+            self.spare_chances += spare_chances
+        if date is not None:
+            if date not in self.series:
+                self.series[date] = [0, 0]
+                bisect.insort(self.series_dates, date)
+            series = self.series[date]
+            series[0] += 1
+            series[1] += score
+            if series[1] > self.high_series:
+                self.high_series = series[1]
+
+
+_FRAME_COUNTS = {}
+
+def _frame_counts(frame):
+    """ Returns (strikes, strike chances, spares, spare chances) for one
+            frame given as a list of strings
+
+        Every throw at a full rack is a chance at a strike, and every
+        such throw that leaves pins standing and is followed by another
+        throw in the frame is a chance at a spare.
+    """
+    key = tuple(frame)
+    counts = _FRAME_COUNTS.get(key)
+    if counts is None:
+        strikes = strike_chances = spares = spare_chances = 0
+        fresh = True#True when a full rack of 10 pins is standing
+        for i, throw in enumerate(key):
+            if fresh:
+                strike_chances += 1
+                if throw == 'X':
+                    strikes += 1
+                    continue
+                fresh = False
+                if i + 1 < len(key):
+                    spare_chances += 1
+            else:
+                if throw == '/':
+                    spares += 1
+                fresh = True
+        counts = _FRAME_COUNTS[key] = (strikes, strike_chances, spares,
+                                       spare_chances)
+    return counts
+
+
+class LeagueStats(object):
+    """ Completed games indexed by player and date, with each player's
+        PlayerStats and a leaderboard of high games
+    """
+
+    def __init__(self, leaderboard_size=10):
+        """ leaderboard_size: the number of high games remembered
+                by top_games
+        """
+        self.leaderboard_size = leaderboard_size
+        self.games = []
+        self.players = {}
+        #date -> ids of the games bowled that day
+        self._by_date = {}
+        #the dates in _by_date, sorted for range queries
+        self._dates = []
+        #a min-heap of (score, -game id) of the best games
+        self._leaderboard = []
+
+    def add_game(self, player, frames, date=None):
+        """ Adds a completed game
+
+            player: the player's name
+            frames: their ten frames, as a list of lists of strings as
+                stored in a score sheet
+            date: optionally, the date it was bowled
+
+            return value: the id of the game, counting from 0
+        """
+        if len(frames) != 10:
+            raise ValueError("only completed games can be added")
+        scorer = tenpin_core.FrameScorer()
+        for frame in frames:
+            scorer.add_frame(frame)
+        game_id = len(self.games)
+        game = CompletedGame(game_id, player, date,
+                             [list(frame) for frame in frames], scorer.score)
+        self.games.append(game)
+        stats = self.players.get(player)
+        if stats is None:
+            stats = self.players[player] = PlayerStats()
+        stats._add(game_id, date, frames, scorer.frame_scores)
+        if date is not None:
+            if date not in self._by_date:
+                self._by_date[date] = []
+                bisect.insort(self._dates, date)
+            self._by_date[date].append(game_id)
+        #ties keep the game bowled first
+        entry = (game.score, -game_id)
+        if len(self._leaderboard) < self.leaderboard_size:
+            heapq.heappush(self._leaderboard, entry)
+        elif entry > self._leaderboard[0]:
+            heapq.heapreplace(self._leaderboard, entry)
+        return game_id
+
+    def add_score_sheet(self, player_names, score_sheet, date=None):
+        """ Adds every player's game from a finished score sheet, as
+                built by the interactive application
+
+            return value: the ids of the games added
+        """
+        return [self.add_game(name, frames, date)
+                for name, frames in zip(player_names, score_sheet)]
+
+    def player(self, name):
+        """ Returns a player's PlayerStats; raises KeyError for a player
+                with no completed games
+        """
+        return self.players[name]
+
+    def games_for(self, name):
+        """ Returns a player's games, in the order they were added """
+        stats = self.players.get(name)
+        if stats is None:
+            return []
+        return [self.games[game_id] for game_id in stats.game_ids]
+
+    def games_between(self, start=None, end=None):
+        """ Returns the games bowled from start to end inclusive, either
+                of which may be None for no limit, in date order
+        """
+        dates = self._dates
+        first = 0 if start is None else bisect.bisect_left(dates, start)
+        last = len(dates) if end is None else bisect.bisect_right(dates, end)
+        return [self.games[game_id] for date in dates[first:last]
+                for game_id in self._by_date[date]]
+
+    def top_games(self, n=None):
+        """ Returns the n highest scoring games, best first; n can't
+                be more than leaderboard_size, which is the default
+        """
+        if n is None:
+            n = self.leaderboard_size
+        elif n > self.leaderboard_size:
+            raise ValueError("only the top %d games are kept"
+                             %self.leaderboard_size)
+        return [self.games[-negative_id] for score, negative_id
+                in sorted(self._leaderboard, reverse=True)[:n]]
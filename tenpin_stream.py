@@ -0,0 +1,161 @@
+""" Scoring a game one throw at a time, as a pinsetter reports them
+
+    A ThrowStream takes the number of pins knocked down by each ball
+    and works out the rest itself: where each frame ends, which throws
+    are strikes or spares and whether the tenth frame earns fill balls.
+    Every throw is checked against the pins still standing before it
+    is accepted.
+
+    As throws arrive the stream reports events, each a StreamEvent of
+    (kind, frame number, value):
+
+        FRAME_COMPLETED  a frame has been thrown; value is its notation,
+                         e.g. ['5','/']
+        BONUS_RESOLVED   a strike or spare got its last bonus throw;
+                         value is the points that frame is worth
+        SCORE_UPDATED    the current score changed; value is the score
+                         and frame is the last frame it counts
+
+    Events are returned from each throw, passed to an optional callback
+    and available as a generator through stream_events. Each throw only
+    updates a FrameScorer, so nothing is ever rescored.
+
+    Running this module directly reads one pin count per line from
+    stdin and prints each event as soon as its throw is read.
+"""
+
+import numbers
+import sys
+from collections import namedtuple
+
+import tenpin_core
+
+StreamEvent = namedtuple('StreamEvent', ['kind', 'frame', 'value'])
+
+FRAME_COMPLETED = 'frame'
+BONUS_RESOLVED = 'bonus'
+SCORE_UPDATED = 'score'
+
+
+class ThrowStream(object):
+    """ One player's game, fed a throw at a time """
+
+    def __init__(self, callback=None):
+        """ callback: optionally, a function called with each
+                StreamEvent as it happens
+        """
+        self.callback = callback
+        self.scorer = tenpin_core.FrameScorer()
+        #pin counts of the frame currently being thrown
+        self._current = []
+        #indices of completed strikes and spares still waiting on bonuses
+        self._unresolved = []
+        self._last_score = 0
+
+    @property
+    def game_over(self):
+        """ True once all ten frames have been thrown """
+        return self.scorer.frames_completed == 10
+
+    @property
+    def standing(self):
+        """ The number of pins standing for the next throw """
+        current = self._current
+        if not current:
+            return 10
+        if len(current) == 1:
+            return 10 if current[0] == 10 else 10 - current[0]
+        #only the tenth frame has a third ball: a fresh rack after a
+        #double or a spare, otherwise whatever the second ball left
+        if current[1] == 10 or current[0] + current[1] == 10:
+            return 10
+        return 10 - current[1]
+
+    def throw(self, pins):
+        """ Records a throw
+
+            pins: integer number of pins knocked down, 0 to 10 inclusive
+
+            return value: a list of the StreamEvents the throw caused,
+                in the order they happened; raises ValueError if the
+                throw isn't possible, leaving the game unchanged
+        """
+        if self.game_over:
+            raise ValueError("the game is over")
+        #bool is Integral too, but True is no count of pins
+        if (not isinstance(pins, numbers.Integral) or isinstance(pins, bool)
+                or not 0 <= pins <= self.standing):
+            raise ValueError("invalid throw %r with %d pins standing"
+                             %(pins, self.standing))
+        pins = int(pins)
+        scorer = self.scorer
+        self._current.append(pins)
+        completed = scorer.add_throw(pins)
+        events = []
+        #bonuses resolve oldest first, before this throw's own frame
+        if self._unresolved:
+            frame_scores = scorer.frame_scores
+            while (self._unresolved
+                   and frame_scores[self._unresolved[0]] is not None):
+                f = self._unresolved.pop(0)
+                events.append(StreamEvent(BONUS_RESOLVED, f + 1,
+                                          frame_scores[f]))
+        if completed:
+            f = scorer.frames_completed - 1
+            events.append(StreamEvent(FRAME_COMPLETED, f + 1,
+                            tenpin_core.pins_notation(self._current)))
+            self._current = []
+            if scorer.frame_scores[f] is None:
+                self._unresolved.append(f)
+        score = scorer.score
+        if events and score is not None and score != self._last_score:
+            self._last_score = score
+            events.append(StreamEvent(SCORE_UPDATED,
+                                      scorer.frames_completed, score))
+        if self.callback is not None:
+            for event in events:
+                self.callback(event)
+        return events
+
+
+def stream_events(throws, stream=None):
+    """ Yields every StreamEvent for the throws as each one is taken
+
+        throws: an iterable of integer pin counts; it is only read as
+            far as needed, so it can be a live feed
+        stream: the ThrowStream to feed, a new one by default
+    """
+    if stream is None:
+        stream = ThrowStream()
+    for pins in throws:
+        for event in stream.throw(pins):
+            yield event
+
+
+def format_event(event):
+    """ Describes a StreamEvent in a line of text """
+    if event.kind == FRAME_COMPLETED:
+        return "Completed frame %d: %s"%(event.frame, ','.join(event.value))
+    if event.kind == BONUS_RESOLVED:
+        return "Frame %d is worth %d"%(event.frame, event.value)
+    return "Score after frame %d: %d"%(event.frame, event.value)
+
+
+if __name__ == '__main__':
+    stream = ThrowStream()
+    #readline rather than iterating over stdin, which reads ahead in
+    #blocks and would hold events back until a block is full
+    for line in iter(sys.stdin.readline, ''):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            events = stream.throw(int(line))
+        except ValueError as e:
+            sys.stderr.write("rejected '%s': %s\n"%(line, e))
+            continue
+        for event in events:
+            print(format_event(event))
+        sys.stdout.flush()
+        if stream.game_over:
+            break
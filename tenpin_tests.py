@@ -0,0 +1,1167 @@
+""" Unit tests for tenpin.py and the tenpin_* modules
+
+    Run with "python tenpin.py --test", or directly with
+    "python tenpin_tests.py".
+"""
+
+import unittest
+
+from tenpin import (ask_num_players, collect_player_names,
+                    format_frame_report)
+from tenpin_core import (validate_frame_score, parse_frame_score,
+                         validate_frame_throws, legal_frames,
+                         next_throws_value, calculate_current_score,
+                         FrameScorer, Frame, Game, score_slots, CacheInfo,
+                         FrameWindowCache)
+
+
+class TenpinUnitTests(unittest.TestCase):
+    """ Tests general behavior of the functions of tenpin.py """
+
+    def setUp(self):
+        #Placeholder setup code
+        pass
+
+    #most of the unit tests take advantage of the input_function argument to take input
+    #from a custom function instead of raw_input for testing purposes
+    def test_ask_num_players_valid(self):
+        """ Tests that a valid integer num players can be entered
+        """
+        valid_pnum = ask_num_players(lambda _: '3')
+        self.assertEqual(valid_pnum, 3)
+
+    def test_ask_num_players_invalid(self):
+        """ Tests that invalid player number is rejected until
+            an acceptable entry is received
+        """
+        def two_invalid_then_valid_numplayers_input(_):
+            two_invalid_then_valid_numplayers_input.c += 1
+            returns = ['-','-3','4']
+            return returns[
+                    two_invalid_then_valid_numplayers_input.c]
+        two_invalid_then_valid_numplayers_input.c = -1
+
+        eventually_valid_pnum = ask_num_players(
+                        two_invalid_then_valid_numplayers_input)
+        self.assertEqual(eventually_valid_pnum, 4)
+
+    def test_collect_player_names(self):
+        """ Tests that several player names are properly recorded
+        """
+        def three_playernames_input(_):
+            three_playernames_input.c += 1
+            returns = ['frumulo','','-=-=--=-=-==']
+            return returns[
+                    three_playernames_input.c]
+        three_playernames_input.c = -1
+
+        three_player_names = collect_player_names(3,
+                                    three_playernames_input)
+        self.assertEqual(len(three_player_names), 3)
+        self.assertEqual(three_player_names, ['frumulo',
+                                        '','-=-=--=-=-=='])
+
+    def test_validate_frame_score_normal(self):
+        """ Tests frame score validation function
+            behaves appropriately on normal (non-
+            tenth) frames
+        """
+        nframes_good = ["1,2","0,0","0,9","1,0","5,/","X","0,/"]
+        self.assertEqual([validate_frame_score(frame,False) 
+                                    for frame in nframes_good],
+                                    [True for _ in nframes_good])
+        nframes_bad = [",2","X,X","","7,8","/,/"]
+        self.assertEqual([validate_frame_score(frame,False) 
+                                    for frame in nframes_bad],
+                                    [False for _ in nframes_bad])
+
+
+    def test_validate_frame_score_tenth(self):
+        """ Tests frame score validation function
+            behaves appropriately on tenth frames
+        """    
+        tframes_good = ["2,3","2,/,X","2,/,7","X,X,X",
+                                        "X,X,7","X,7,/"]
+        self.assertEqual([validate_frame_score(frame,True) 
+                                    for frame in tframes_good],
+                                    [True for _ in tframes_good])
+        tframes_bad = [",2","X,X","","7,8","/,/",
+                        "X,/,X","2,/,/","/,X,X","2,X,7","X,7,9"]
+        self.assertEqual([validate_frame_score(frame,True) 
+                                    for frame in tframes_bad],
+                                    [False for _ in tframes_bad])
+
+    def test_parse_frame_score(self):
+        """ Tests that frame parsing returns the throws of
+            valid frames and None for invalid ones
+        """
+        self.assertEqual(parse_frame_score("5,/",False),
+                         ('5','/'))
+        self.assertEqual(parse_frame_score("X",False),('X',))
+        self.assertEqual(parse_frame_score("X,7,/",True),
+                         ('X','7','/'))
+        self.assertEqual(parse_frame_score("X",True),None)
+        self.assertEqual(parse_frame_score("X,X,X",False),None)
+        self.assertEqual(parse_frame_score("7,8",True),None)
+
+    def test_validate_frame_throws(self):
+        """ Tests that parsed frames validate just as the strings
+            they were parsed from do
+        """
+        for tenth in (False, True):
+            for frame in legal_frames(tenth):
+                throws = parse_frame_score(frame, tenth)
+                self.assertTrue(validate_frame_throws(throws, tenth))
+                self.assertTrue(validate_frame_throws(list(throws),
+                                                      tenth))
+        self.assertFalse(validate_frame_throws(('X','X'), False))
+        self.assertFalse(validate_frame_throws(('X',), True))
+        self.assertFalse(validate_frame_throws(('7','8'), False))
+
+    def test_frame_window_cache_score(self):
+        """ Tests that FrameWindowCache scores the same as
+            calculate_current_score, and counts hits and misses
+        """
+        cache = FrameWindowCache(maxsize=100)
+        sheets = [[['X']]*9 + [['X','X','X']],
+                  [['X'],['0','0'],['X'],['0','/'],['X'],
+                   ['0','0'],['X'],['0','/'],['X'],['0','/','0']],
+                  [['1','2'],['3','4'],['X']],
+                  [['1','2'],['X'],['X']],
+                  [['1','2'],['3','4'],['5','/']],
+                  [['X'],['7','/'],['3','0']],
+                  [['7','/'],['X'],['3','0'],['3','4']],
+                  [['X'],['X'],['3','0'],['3','4']]]
+        for sheet in sheets:
+            self.assertEqual(cache.score(sheet),
+                             calculate_current_score(sheet))
+        info = cache.cache_info()
+        self.assertEqual(info.currsize, info.misses)
+        #a second pass over the same game only hits
+        self.assertEqual(cache.score(sheets[0]), 300)
+        self.assertEqual(cache.cache_info(),
+                CacheInfo(info.hits + 10, info.misses, 100,
+                          info.currsize))
+
+    def test_frame_window_cache_bound(self):
+        """ Tests that FrameWindowCache never holds more
+            than maxsize windows
+        """
+        cache = FrameWindowCache(maxsize=2)
+        for frame in [('1','2'),('3','4'),('5','4'),('1','2')]:
+            cache.frame_value(frame, ())
+        self.assertEqual(cache.cache_info(),
+                         CacheInfo(0, 4, 2, 2))
+        for maxsize in (0, -1):
+            self.assertRaises(ValueError, FrameWindowCache, maxsize)
+
+    def test_legal_frames(self):
+        """ Tests that every legal frame validates
+        """
+        self.assertEqual(len(legal_frames(False)), 66)
+        self.assertEqual(len(legal_frames(True)), 241)
+        for tenth in (False, True):
+            for frame in legal_frames(tenth):
+                self.assertTrue(validate_frame_score(frame,
+                                                     tenth))
+
+    def test_format_frame_report(self):
+        """ Tests the lines printed after each frame
+        """
+        self.assertEqual(format_frame_report(3, 'ann', 45),
+                         "Completed frame 3 for player 'ann'.\n"
+                         + "Their current score is 45")
+        from tenpin_projection import ScoreBounds
+        self.assertEqual(format_frame_report(4, 'bob', None,
+                                    ScoreBounds(None, 20, 80)),
+                         "Completed frame 4 for player 'bob'.\n"
+                         + "(Their current score is unavailable)"
+                         + "\nTheir final score can be from 20"
+                         + " to 80")
+        self.assertEqual(format_frame_report(10, 'cy', 300),
+                         "Completed frame 10 for player 'cy'\n"
+                         + "Final score: 300")
+
+    def test_next_throws_value_short(self):
+        """ Tests that next_throws_value can find the
+            value of the next 1 and 2 throws outside of the 
+            10th frame
+        """
+        easy_frames = [['1','2'],['3','4'],['5','/']]
+        self.assertEqual(next_throws_value(easy_frames,0,1),3)
+        self.assertEqual(next_throws_value(easy_frames,1,2),10)
+
+    def test_next_throws_value_end(self):
+        """ Tests that next_throws_value can find the
+            value of the next 1 and 2 throws within the 10th frame
+        """
+        ten_frames1 = [['1','2'],['3','4'],['5','/'],['1','2'],
+                       ['3','4'],['5','/'],['1','2'],['3','4'],
+                       ['5','/'],['3','/','X']]
+        ten_frames2 = [['1','2'],['3','4'],['5','/'],['1','2'],
+                       ['3','4'],['5','/'],['1','2'],['3','4'],
+                       ['5','/'],['X','3','/']]
+        ten_frames3 = [['1','2'],['3','4'],['5','/'],['1','2'],
+                       ['3','4'],['5','/'],['1','2'],['3','4'],
+                       ['5','/'],['3','/','3']]
+        ten_frames4 = [['1','2'],['3','4'],['5','/'],['1','2'],
+                       ['3','4'],['5','/'],['1','2'],['3','4'],
+                       ['5','/'],['X','2','5']]
+        self.assertEqual(next_throws_value(ten_frames1,9,1),10)
+        self.assertEqual(next_throws_value(ten_frames2,9,2),10)
+        self.assertEqual(next_throws_value(ten_frames3,9,1),3)
+        self.assertEqual(next_throws_value(ten_frames4,9,2),7)
+
+    def test_calculate_current_score_inprogress(self):
+        """ Tests that scores can be reported when possible in
+            a game in progress, and not reported when currently 
+            indeterminate
+        """
+        easy_frames = [['1','2'],['3','4'],['5','0']]
+        strike_good_frames = [['X'],['3','6'],['5','0']]
+        strike_bad_frames1 = [['1','2'],['3','4'],['X']]
+        strike_bad_frames2 = [['1','2'],['X'],['X']]
+        spare_good_frames = [['1','2'],['3','/'],['5','0']]
+        spare_bad_frames =  [['1','2'],['3','4'],['5','/']]
+        strike_spare_frames =  [['X'],['7','/'],['3','0']]
+        spare_strike_frames =  [['7','/'],['X'],['3','0'],['3','4']]
+        double_strike_frames =  [['X'],['X'],['3','0'],['3','4']]
+        double_spare_frames =  [['7','/'],['2','/'],['3','0'],['3','4']]
+
+        self.assertEqual(calculate_current_score(easy_frames),15)
+        self.assertEqual(calculate_current_score(strike_good_frames),33)
+        self.assertEqual(calculate_current_score(strike_bad_frames1),None)
+        self.assertEqual(calculate_current_score(strike_bad_frames2),None)
+        self.assertEqual(calculate_current_score(spare_good_frames),23)
+        self.assertEqual(calculate_current_score(spare_bad_frames),None)
+        self.assertEqual(calculate_current_score(strike_spare_frames),36)
+        self.assertEqual(calculate_current_score(spare_strike_frames),43)
+        self.assertEqual(calculate_current_score(double_strike_frames),46)
+        self.assertEqual(calculate_current_score(double_spare_frames),35)
+
+    def test_calculate_current_score_final(self):
+        """ Tests that final scores are reported correctly
+        """
+        gutter_frames = [['0','0'],['0','0'],['0','0'],['0','0'],
+                       ['0','0'],['0','0'],['0','0'],['0','0'],
+                       ['0','0'],['0','0']]
+        perfect_frames = [['X'],['X'],['X'],['X'],
+                       ['X'],['X'],['X'],['X'],
+                       ['X'],['X','X','X']]
+        alternate_frames = [['X'],['0','0'],['X'],['0','/'],
+                       ['X'],['0','0'],['X'],['0','/'],
+                       ['X'],['0','/','0']]
+        ten_frames1 = [['1','2'],['3','4'],['5','/'],['1','2'],
+                       ['3','4'],['5','/'],['1','2'],['3','4'],
+                       ['5','/'],['3','/','X']]
+        ten_frames2 = [['1','2'],['3','4'],['5','/'],['1','2'],
+                       ['3','4'],['5','/'],['1','2'],['3','4'],
+                       ['5','/'],['X','3','/']]
+        ten_frames3 = [['1','2'],['3','4'],['5','/'],['1','2'],
+                       ['3','4'],['5','/'],['1','2'],['3','4'],
+                       ['5','/'],['3','/','3']]
+        ten_frames4 = [['1','2'],['3','4'],['5','/'],['1','2'],
+                       ['3','4'],['5','/'],['1','2'],['3','4'],
+                       ['5','/'],['X','2','5']]
+        ten_frames5 = [['1','2'],['3','4'],['5','/'],['1','2'],
+                       ['3','4'],['5','/'],['1','2'],['3','4'],
+                       ['5','/'],['2','5']]
+        self.assertEqual(calculate_current_score(gutter_frames),0)
+        self.assertEqual(calculate_current_score(perfect_frames),300)
+        self.assertEqual(calculate_current_score(alternate_frames),130)
+        self.assertEqual(calculate_current_score(ten_frames1),85)
+        self.assertEqual(calculate_current_score(ten_frames2),92)
+        self.assertEqual(calculate_current_score(ten_frames3),78)
+        self.assertEqual(calculate_current_score(ten_frames4),89)
+        self.assertEqual(calculate_current_score(ten_frames5),71)
+        ten_frames6 = ten_frames5[:9] + [['X','X','5']]
+        self.assertEqual(calculate_current_score(ten_frames6),97)
+
+    def test_frame_scorer_matches_full_rescore(self):
+        """ Tests that FrameScorer reports the same score as
+            calculate_current_score after every frame,
+            including None while a bonus is unresolved
+        """
+        sheets = [[['X'],['X'],['X'],['X'],['X'],['X'],['X'],
+                   ['X'],['X'],['X','X','X']],
+                  [['X'],['0','0'],['X'],['0','/'],['X'],
+                   ['0','0'],['X'],['0','/'],['X'],['0','/','0']],
+                  [['7','/'],['X'],['3','0'],['3','4'],['X'],
+                   ['X'],['1','/'],['9','0'],['X'],['X','3','/']],
+                  [['1','2'],['3','4'],['5','/'],['1','2'],
+                   ['3','4'],['5','/'],['1','2'],['3','4'],
+                   ['5','/'],['2','5']]]
+        for sheet in sheets:
+            scorer = FrameScorer()
+            for f in range(len(sheet)):
+                self.assertEqual(scorer.add_frame(sheet[f]),
+                            calculate_current_score(sheet[:f+1]))
+            self.assertEqual(scorer.frames_completed, 10)
+
+    def test_frame_scorer_throws(self):
+        """ Tests that FrameScorer infers frame boundaries
+            when given one throw at a time
+        """
+        scorer = FrameScorer()
+        self.assertEqual(scorer.add_throw(10), True)
+        self.assertEqual(scorer.score, None)
+        self.assertEqual(scorer.add_throw(7), False)
+        self.assertEqual(scorer.add_throw(3), True)
+        self.assertEqual(scorer.frame_scores, [20, None])
+        self.assertEqual(scorer.add_throw(4), False)
+        self.assertEqual(scorer.score, 34)
+
+    def test_frame_scorer_game_over(self):
+        """ Tests that FrameScorer refuses throws and frames after
+            the tenth frame
+        """
+        scorer = FrameScorer()
+        for t in range(20):
+            scorer.add_throw(1)
+        self.assertEqual(scorer.frames_completed, 10)
+        self.assertRaises(ValueError, scorer.add_throw, 0)
+        self.assertRaises(ValueError, scorer.add_frame, ['X'])
+        self.assertEqual(scorer.frames_completed, 10)
+        self.assertEqual(scorer.score, 20)
+
+    def test_game_round_trip(self):
+        """ Tests that Game converts to and from the
+            list-of-strings form without loss
+        """
+        frames = [['X'],['0','/'],['7','2'],['0','0'],['X'],
+                  ['5','/'],['X'],['X'],['9','/'],['X','7','/']]
+        game = Game.from_frames(frames)
+        self.assertEqual(len(game), 10)
+        self.assertEqual(len(game.throws), 17)
+        self.assertEqual(game.frame(1), Frame([0,10]))
+        self.assertEqual(hash(game.frame(1)), hash(Frame([0,10])))
+        self.assertEqual(len(set(game.frame(f) for f in range(10))), 7)
+        self.assertEqual(game.to_frames(), frames)
+        self.assertEqual(Game.from_frames([['X','X','X']])
+                            .to_frames(), [['X','X','X']])
+
+    def test_score_slots(self):
+        """ Tests that games scored from their 21 slots match
+            calculate_current_score
+        """
+        sheets = [[['X']]*9 + [['X','X','X']],
+                  [['X'],['0','0'],['X'],['0','/'],['X'],
+                   ['0','0'],['X'],['0','/'],['X'],['0','/','0']],
+                  [['X']]*8 + [['X'],['X','7','2']],
+                  [['X']]*8 + [['7','/'],['X','X','5']],
+                  [['0','0']]*9 + [['2','5']]]
+        for sheet in sheets:
+            self.assertEqual(score_slots(
+                                Game.from_frames(sheet).slots()),
+                             calculate_current_score(sheet))
+
+    def test_game_score(self):
+        """ Tests that Game scores the same as
+            calculate_current_score
+        """
+        sheets = [[['X'],['X'],['X'],['X'],['X'],['X'],['X'],
+                   ['X'],['X'],['X','X','X']],
+                  [['X'],['0','0'],['X'],['0','/'],['X'],
+                   ['0','0'],['X'],['0','/'],['X'],['0','/','0']],
+                  [['1','2'],['3','4'],['X']],
+                  [['X'],['7','/'],['3','0']],
+                  [['7','/'],['2','/'],['3','0'],['3','4']]]
+        for sheet in sheets:
+            self.assertEqual(Game.from_frames(sheet).score(),
+                             calculate_current_score(sheet))
+
+    def test_game_slots(self):
+        """ Tests that Game lays out throws in 21 slots
+        """
+        frames = [['X'],['0','/'],['7','2'],['0','0'],['X'],
+                  ['5','/'],['X'],['X'],['9','/'],['X','7','/']]
+        self.assertEqual(Game.from_frames(frames).slots(),
+                         [10,0,0,10,7,2,0,0,10,0,5,5,10,0,
+                          10,0,9,1,10,7,3])
+        self.assertEqual(Game.from_frames([['1','2']]).slots(),
+                         [1,2] + [0]*19)
+
+    def test_core_imports_are_light(self):
+        """ Tests that importing the scoring core doesn't pull in
+            argparse, unittest or the interactive application
+        """
+        import os
+        import subprocess
+        import sys
+        loaded = subprocess.check_output([sys.executable, '-c',
+                    "import sys, tenpin_core; print(' '.join(sys.modules))"],
+                    cwd=os.path.dirname(os.path.abspath(__file__))).split()
+        for heavy in ['argparse', 'unittest', 'tenpin']:
+            self.assertNotIn(heavy, loaded)
+
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+
+
+class TenpinBatchUnitTests(unittest.TestCase):
+    """ Tests the vectorized scorer in tenpin_batch.py """
+
+    def test_score_batch_final(self):
+        """ Tests that batch final and per-frame scores match
+            calculate_current_score on complete games
+        """
+        import tenpin_batch
+        games = [[['0','0']]*10,
+                 [['X']]*9 + [['X','X','X']],
+                 [['X'],['0','0'],['X'],['0','/'],['X'],
+                  ['0','0'],['X'],['0','/'],['X'],['0','/','0']],
+                 [['1','2'],['3','4'],['5','/'],['1','2'],
+                  ['3','4'],['5','/'],['1','2'],['3','4'],
+                  ['5','/'],['3','/','X']],
+                 [['1','2'],['3','4'],['5','/'],['1','2'],
+                  ['3','4'],['5','/'],['1','2'],['3','4'],
+                  ['5','/'],['X','3','/']],
+                 [['1','2'],['3','4'],['5','/'],['1','2'],
+                  ['3','4'],['5','/'],['1','2'],['3','4'],
+                  ['5','/'],['2','5']],
+                 [['7','/'],['X'],['3','0'],['3','4'],['X'],
+                  ['X'],['1','/'],['9','0'],['X'],['X','3','/']]]
+        finals, cumulative = tenpin_batch.score_batch(
+                            tenpin_batch.frames_to_array(games))
+        self.assertEqual(list(finals),
+            [calculate_current_score(game) for game in games])
+        self.assertEqual(list(finals[:3]), [0,300,130])
+        for g,game in enumerate(games):
+            scorer = FrameScorer()
+            for frame in game:
+                scorer.add_frame(frame)
+            running = [sum(scorer.frame_scores[:f+1])
+                            for f in range(10)]
+            self.assertEqual(list(cumulative[g]), running)
+
+
+class TenpinBulkUnitTests(unittest.TestCase):
+    """ Tests the non-interactive scoring in tenpin_bulk.py """
+
+    def test_parse_game_line(self):
+        """ Tests that game lines are split and validated
+        """
+        import tenpin_bulk
+        name, frames = tenpin_bulk.parse_game_line(
+                        "ann|X|X|X|X|X|X|X|X|X|X,X,X")
+        self.assertEqual(name, "ann")
+        self.assertEqual(frames, [['X']]*9 + [['X','X','X']])
+        self.assertRaises(ValueError, tenpin_bulk.parse_game_line,
+                          "ann|X|X")
+        self.assertRaises(ValueError, tenpin_bulk.parse_game_line,
+                          "ann|X|X|X|X|X|X|X|X|X|X")
+
+    def test_run_bulk(self):
+        """ Tests that valid games are scored in order and
+            malformed lines are reported by line number
+        """
+        import tenpin_bulk
+        from StringIO import StringIO
+        infile = StringIO("ann|X|X|X|X|X|X|X|X|X|X,X,X\n"
+                          + "bob|X|7,8\n"
+                          + "\n"
+                          + "cy|0,0|0,0|0,0|0,0|0,0|0,0|0,0"
+                          + "|0,0|0,0|1,/,5\n")
+        outfile = StringIO()
+        errfile = StringIO()
+        self.assertEqual(tenpin_bulk.run_bulk(infile, outfile,
+                                              errfile), (2, 1))
+        self.assertEqual(outfile.getvalue(),
+                         "ann: 300\ncy: 15\n")
+        self.assertEqual(errfile.getvalue(), "line 2: expected"
+                         + " a name and 10 frames, found 2 frames\n")
+
+    def test_score_games_parallel(self):
+        """ Tests that parallel scoring keeps results in
+            input order across chunks and workers
+        """
+        import tenpin_bulk
+        import tenpin_parallel
+        lines = [(1, "ann|X|X|X|X|X|X|X|X|X|X,X,X"),
+                 (2, "bob|X|7,8"),
+                 (3, "cy|0,0|0,0|0,0|0,0|0,0|0,0|0,0|0,0|0,0|1,/,5"),
+                 (4, "di|X|0,0|X|0,/|X|0,0|X|0,/|X|0,/,0")]
+        self.assertEqual(
+            list(tenpin_parallel.score_games_parallel(lines*3,
+                                            workers=2,
+                                            chunk_size=2)),
+            list(tenpin_bulk.score_games(
+                    tenpin_bulk.parse_games(lines*3))))
+        for workers, chunk_size in [(0, 2), (-1, 2), (2, 0), (2, -5)]:
+            self.assertRaises(ValueError, list,
+                    tenpin_parallel.score_games_parallel(lines,
+                                            workers, chunk_size))
+
+
+class TenpinServerUnitTests(unittest.TestCase):
+    """ Tests the lane protocol in tenpin_server.py """
+
+    def test_scoring_service_game(self):
+        """ Tests that frames entered on a lane are scored
+            and that games on different lanes are kept apart
+        """
+        import tenpin_server
+        service = tenpin_server.ScoringService()
+        self.assertEqual(service.handle_line("NEW 1 ann|bob"),
+                         "OK 1 2")
+        self.assertEqual(service.handle_line("NEW 2 cy"),
+                         "OK 2 1")
+        self.assertEqual(service.handle_line("FRAME 1 1 X"),
+                         "SCORE 1 1 1 -")
+        self.assertEqual(service.handle_line("FRAME 2 1 3,4"),
+                         "SCORE 2 1 1 7")
+        self.assertEqual(service.handle_line("FRAME 1 1 3,4"),
+                         "SCORE 1 1 2 24")
+        for f in range(8):
+            service.handle_line("FRAME 1 2 X")
+        self.assertEqual(service.handle_line("FRAME 1 2 X,X,X"),
+                         "ERR invalid frame 9: 'X,X,X'")
+        service.handle_line("FRAME 1 2 X")
+        self.assertEqual(service.handle_line("FRAME 1 2 X,X,X"),
+                         "SCORE 1 2 10 300")
+        self.assertEqual(service.handle_line("FRAME 1 2 X"),
+                         "ERR player 2 on lane 1 has finished")
+        self.assertEqual(service.handle_line("END 1"), "OK 1")
+        self.assertEqual(service.handle_line("FRAME 1 1 X"),
+                         "ERR no game on lane 1")
+
+    def test_scoring_service_errors(self):
+        """ Tests that malformed requests are answered with ERR
+        """
+        import tenpin_server
+        service = tenpin_server.ScoringService()
+        service.handle_line("NEW 1 ann")
+        self.assertEqual(service.handle_line("FRAME 1 2 X"),
+                         "ERR no player number 2 on lane 1")
+        self.assertEqual(service.handle_line("FRAME 1"),
+                         "ERR wrong number of arguments for FRAME")
+        self.assertEqual(service.handle_line("NEW 2 a|b|c|d|e|f|g|h|i|j"),
+                         "ERR a game has at most 9 players")
+        self.assertEqual(service.handle_line("BOWL"),
+                         "ERR unknown command 'BOWL'")
+
+    def test_scoring_service_lane_in_use(self):
+        """ Tests that a game in progress isn't replaced by another
+            started on the same lane until it is ended
+        """
+        import tenpin_server
+        service = tenpin_server.ScoringService()
+        service.handle_line("NEW 7 a|b")
+        service.handle_line("FRAME 7 1 X")
+        service.handle_line("FRAME 7 2 3,4")
+        self.assertEqual(service.handle_line("NEW 7 c"),
+                         "ERR lane 7 already has a game in progress")
+        self.assertEqual(service.handle_line("FRAME 7 2 5,2"),
+                         "SCORE 7 2 2 14")
+        self.assertEqual(service.handle_line("END 7"), "OK 7")
+        self.assertEqual(service.handle_line("NEW 7 c"), "OK 7 1")
+
+    def test_scoring_server_socket_path(self):
+        """ Tests that only a stale socket is replaced when listening
+            on a Unix socket path
+        """
+        import os
+        import shutil
+        import socket
+        import tempfile
+        import tenpin_server
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'notasocket.txt')
+            with open(path, 'w') as ordinary_file:
+                ordinary_file.write('keep me')
+            self.assertRaises(ValueError, tenpin_server.ScoringServer,
+                              path, map={})
+            with open(path) as ordinary_file:
+                self.assertEqual(ordinary_file.read(), 'keep me')
+            path = os.path.join(directory, 'lanes.sock')
+            stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            stale.bind(path)
+            stale.close()
+            server = tenpin_server.ScoringServer(path, map={})
+            self.assertEqual(server.socket_path, path)
+            server.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+class TenpinBenchUnitTests(unittest.TestCase):
+    """ Tests the game generation and comparison in
+        tenpin_bench.py
+    """
+
+    def test_random_games(self):
+        """ Tests that generated games are valid and the same
+            for the same seed
+        """
+        import tenpin_bench
+        for mix in tenpin_bench.MIXES:
+            games = tenpin_bench.random_games(200, mix, seed=7)
+            self.assertEqual(games, tenpin_bench.random_games(
+                                            200, mix, seed=7))
+            for game in games:
+                self.assertEqual(len(game), 10)
+                for f,frame in enumerate(game):
+                    self.assertTrue(validate_frame_score(
+                                        ','.join(frame), f == 9))
+
+    def test_compare(self):
+        """ Tests that only slowdowns past the threshold are
+            flagged as regressions
+        """
+        import tenpin_bench
+        baseline = {'results': {'a': {'games_per_second': 100.0},
+                                'b': {'games_per_second': 100.0},
+                                'c': {'games_per_second': 100.0}}}
+        current = {'results': {'a': {'games_per_second': 95.0},
+                               'b': {'games_per_second': 80.0},
+                               'd': {'games_per_second': 10.0}}}
+        self.assertEqual(tenpin_bench.compare(baseline, current,
+                                              0.1),
+                         [('a', 100.0, 95.0, False),
+                          ('b', 100.0, 80.0, True)])
+
+    def test_measure(self):
+        """ Tests that memory is only reported when tracemalloc
+            can measure it
+        """
+        import tenpin_bench
+        games = tenpin_bench.random_games(20, 'mixed', seed=7)
+        result = tenpin_bench.measure(tenpin_bench.bench_full_game,
+                                      games, 1)
+        self.assertTrue(result['games_per_second'] > 0)
+        self.assertEqual('peak_bytes_per_game' in result,
+                         tenpin_bench.tracemalloc is not None)
+
+
+class TenpinArchiveUnitTests(unittest.TestCase):
+    """ Tests the binary game archive in tenpin_archive.py """
+
+    def setUp(self):
+        import tempfile
+        self.directory = tempfile.mkdtemp()
+        self.path = self.directory + '/games.tpga'
+        self.sheet = [[['X']]*9 + [['X','X','X']],
+                      [['X'],['0','0'],['X'],['0','/'],['X'],
+                       ['0','0'],['X'],['0','/'],['X'],
+                       ['0','/','0']],
+                      [['1','2'],['3','4'],['5','/'],['1','2'],
+                       ['3','4'],['5','/'],['1','2'],['3','4'],
+                       ['5','/'],['2','5']]]
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.directory)
+
+    def test_archive_round_trip(self):
+        """ Tests that archived games can be read back in any
+            order and rescored
+        """
+        import tenpin_archive
+        tenpin_archive.archive_score_sheet(self.path, self.sheet,
+                                           [7, 8, 9])
+        tenpin_archive.archive_score_sheet(self.path,
+                                           self.sheet[:1], [10])
+        with tenpin_archive.Archive(self.path) as archive:
+            self.assertEqual(len(archive), 4)
+            for n in [2, 0, 3, 1]:
+                record = archive[n]
+                frames = self.sheet[n % 3]
+                self.assertEqual(record.player_id, 7 + n)
+                self.assertEqual(record.frames(), frames)
+                self.assertEqual(record.final_score,
+                        calculate_current_score(frames))
+                self.assertEqual(record.rescore(),
+                                 record.final_score)
+            self.assertEqual([r.final_score for r in archive],
+                             [300, 130, 71, 300])
+            self.assertRaises(IndexError, archive.__getitem__, 4)
+
+    def test_archive_rejects(self):
+        """ Tests that unfinished games and files that aren't
+            archives are rejected
+        """
+        import tenpin_archive
+        with tenpin_archive.ArchiveWriter(self.path) as writer:
+            self.assertRaises(ValueError, writer.write_game, 1,
+                              [['X']])
+        with open(self.directory + '/other', 'w') as other:
+            other.write("ann: 300\n" * 4)
+        self.assertRaises(ValueError, tenpin_archive.Archive,
+                          self.directory + '/other')
+        self.assertRaises(ValueError, tenpin_archive.ArchiveWriter,
+                          self.directory + '/other')
+        with open(self.directory + '/other') as other:
+            self.assertEqual(other.read(), "ann: 300\n" * 4)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_archive_records_array(self):
+        """ Tests that the mapped records feed straight into
+            the batch scorer
+        """
+        import tenpin_archive
+        import tenpin_batch
+        tenpin_archive.archive_score_sheet(self.path, self.sheet)
+        with tenpin_archive.Archive(self.path) as archive:
+            records = archive.records_array()
+            finals, _ = tenpin_batch.score_batch(
+                                            records['throws'])
+            self.assertEqual(list(finals), [300, 130, 71])
+            self.assertEqual(list(records['final_score']),
+                             [300, 130, 71])
+            self.assertEqual(list(records['player_id']),
+                             [0, 1, 2])
+            del records, finals
+
+
+class TenpinJournalUnitTests(unittest.TestCase):
+    """ Tests the write-ahead journal in tenpin_journal.py """
+
+    def setUp(self):
+        import tempfile
+        self.directory = tempfile.mkdtemp()
+        self.path = self.directory + '/games.log'
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.directory)
+
+    def test_journal_recovery(self):
+        """ Tests that games in progress are rebuilt from the
+            journal and a torn last record is dropped
+        """
+        import tenpin_journal
+        with tenpin_journal.Journal(self.path) as journal:
+            journal.new_game('1', ['ann', 'bob'])
+            journal.new_game('2', ['cy'])
+            journal.add_frame('1', 0, ['X'])
+            journal.add_frame('1', 1, ['5','/'])
+            journal.end_game('2')
+        with open(self.path, 'ab') as journal_file:
+            journal_file.write('[6,"frame","1",0,"3')
+        journal = tenpin_journal.Journal(self.path)
+        self.assertEqual(sorted(journal.games), ['1'])
+        self.assertEqual(journal.games['1'].player_names, ['ann', 'bob'])
+        self.assertEqual(journal.games['1'].score_sheet,
+                         [[['X']], [['5','/']]])
+        journal.add_frame('1', 0, ['3','4'])
+        journal.close()
+        games = tenpin_journal.recover(self.path)[0]
+        self.assertEqual(games['1'].score_sheet,
+                         [[['X'],['3','4']], [['5','/']]])
+
+    def test_journal_snapshot(self):
+        """ Tests that snapshots empty the journal, and that records
+            already in a snapshot aren't replayed twice
+        """
+        import os
+        import tenpin_journal
+        journal = tenpin_journal.Journal(self.path, snapshot_every=3)
+        journal.new_game('1', ['ann'])
+        journal.add_frame('1', 0, ['X'])
+        with open(self.path, 'rb') as journal_file:
+            before_snapshot = journal_file.read()
+        journal.add_frame('1', 0, ['7','2'])
+        self.assertEqual(os.path.getsize(self.path), 0)
+        journal.add_frame('1', 0, ['1','/'])
+        journal.close()
+        #as if the process died after the snapshot but before the
+        #journal was emptied
+        with open(self.path, 'rb') as journal_file:
+            after_snapshot = journal_file.read()
+        with open(self.path, 'wb') as journal_file:
+            journal_file.write(before_snapshot + after_snapshot)
+        games, sequence, length = tenpin_journal.recover(self.path)
+        self.assertEqual(games['1'].score_sheet,
+                         [[['X'],['7','2'],['1','/']]])
+        self.assertEqual(sequence, 4)
+
+    def test_journal_bad_records(self):
+        """ Tests that records for missing games or players are refused
+            before they are written, and skipped if found on recovery
+        """
+        import tenpin_journal
+        journal = tenpin_journal.Journal(self.path)
+        journal.new_game('g', ['ann'])
+        self.assertRaises(ValueError, journal.add_frame, 'g', 5, ['X'])
+        self.assertRaises(ValueError, journal.add_frame, 'h', 0, ['X'])
+        self.assertRaises(ValueError, journal.end_game, 'h')
+        journal.add_frame('g', 0, ['X'])
+        journal.close()
+        with open(self.path, 'ab') as journal_file:
+            journal_file.write('[3,"frame","g",5,"X"]\n'
+                               '[4,"frame","h",0,"X"]\n'
+                               '[5,"end"]\n'
+                               '[6,"frame","g",0,"7,2"]\n')
+        journal = tenpin_journal.Journal(self.path)
+        self.assertEqual(journal.games['g'].score_sheet,
+                         [[['X'],['7','2']]])
+        self.assertEqual(journal.sequence, 6)
+        journal.close()
+
+    def test_journal_unicode_names(self):
+        """ Tests that non-ASCII names come back as the UTF-8 strs they
+            were entered as, and names that aren't UTF-8 are refused
+        """
+        import tenpin_journal
+        journal = tenpin_journal.Journal(self.path, snapshot_every=2)
+        journal.new_game('1', ['Jos\xc3\xa9'])
+        journal.add_frame('1', 0, ['X'])#taking a snapshot
+        journal.new_game('2', ['Zo\xc3\xab', 'bob'])
+        self.assertRaises(ValueError, journal.new_game, '3',
+                          ['Jos\xe9'])
+        journal.close()
+        games = tenpin_journal.recover(self.path)[0]
+        self.assertEqual(games['1'].player_names, ['Jos\xc3\xa9'])
+        self.assertEqual(games['2'].player_names, ['Zo\xc3\xab', 'bob'])
+        for game_id, game in games.items():
+            self.assertTrue(isinstance(game_id, str))
+            for name in game.player_names:
+                self.assertTrue(isinstance(name, str))
+        self.assertEqual(sorted(games), ['1', '2'])
+
+    def test_scoring_service_journal(self):
+        """ Tests that a restarted server picks its lanes back up
+        """
+        import tenpin_journal
+        import tenpin_server
+        journal = tenpin_journal.Journal(self.path)
+        service = tenpin_server.ScoringService(journal)
+        service.handle_line("NEW 1 ann|bob")
+        service.handle_line("FRAME 1 1 X")
+        service.handle_line("FRAME 1 2 3,4")
+        journal.close()
+        service = tenpin_server.ScoringService(
+                        tenpin_journal.Journal(self.path))
+        self.assertEqual(service.handle_line("FRAME 1 1 2,5"),
+                         "SCORE 1 1 2 24")
+        self.assertEqual(service.handle_line("END 1"), "OK 1")
+        self.assertEqual(service.journal.games, {})
+
+
+class TenpinStatsUnitTests(unittest.TestCase):
+    """ Tests the league statistics in tenpin_stats.py """
+
+    def setUp(self):
+        import tenpin_stats
+        self.perfect = [['X']]*9 + [['X','X','X']]
+        self.spares = [['5','/']]*9 + [['5','/','5']]
+        self.open = [['1','2']]*10
+        self.stats = tenpin_stats.LeagueStats(leaderboard_size=2)
+        self.stats.add_score_sheet(['ann', 'bob'],
+                                   [self.spares, self.open], '2024-01-02')
+        self.stats.add_game('ann', self.perfect, '2024-01-02')
+        self.stats.add_game('ann', self.open, '2024-01-09')
+
+    def test_player_stats(self):
+        """ Tests the aggregates kept for a player
+        """
+        ann = self.stats.player('ann')
+        self.assertEqual(ann.games, 3)
+        self.assertEqual(ann.average, (150 + 300 + 30) / 3.0)
+        self.assertEqual(ann.high_game, 300)
+        self.assertEqual(ann.high_series, 450)
+        #12 strikes of 12 throws at a full rack in the perfect game,
+        #none of 11 in the spare game, none of 10 in the open game
+        self.assertEqual((ann.strikes, ann.strike_chances), (12, 33))
+        self.assertEqual((ann.spares, ann.spare_chances), (10, 20))
+        self.assertEqual(ann.frame_averages[0], (15 + 30 + 3) / 3.0)
+        self.assertEqual(ann.average_between('2024-01-05'), 30.0)
+        self.assertEqual(ann.average_between(end='2024-01-02'), 225.0)
+        self.assertEqual(ann.average_between('2024-02-01'), None)
+        self.assertRaises(KeyError, self.stats.player, 'cy')
+
+    def test_league_queries(self):
+        """ Tests the game indexes and the bounded leaderboard
+        """
+        self.assertEqual([game.score for game in
+                          self.stats.games_for('ann')], [150, 300, 30])
+        self.assertEqual([game.player for game in
+                          self.stats.games_between('2024-01-02',
+                                                   '2024-01-02')],
+                         ['ann', 'bob', 'ann'])
+        self.assertEqual([(game.player, game.score) for game in
+                          self.stats.top_games()],
+                         [('ann', 300), ('ann', 150)])
+        self.assertRaises(ValueError, self.stats.top_games, 3)
+        self.assertRaises(ValueError, self.stats.add_game, 'cy',
+                          self.open[:9])
+
+
+class TenpinGameUnitTests(unittest.TestCase):
+    """ Tests the thread-safe score sheet in tenpin_game.py """
+
+    def test_shared_score_sheet_order(self):
+        """ Tests frames entered out of turn, and that every player
+            completing a frame is reported once, when it happens
+        """
+        import tenpin_game
+        completed = []
+        sheet = tenpin_game.SharedScoreSheet(['ann', 'bob'],
+                        on_all_completed=completed.append)
+        self.assertEqual(sheet.submit(1, "3,4"), 7)
+        self.assertEqual(sheet.submit(1, "X"), None)
+        self.assertEqual(completed, [])
+        self.assertEqual(sheet.submit(0, ['5','/']), None)
+        self.assertEqual(completed, [1])
+        sheet.submit(0, "1,1")
+        self.assertEqual(completed, [1, 2])
+        self.assertEqual(sheet.frames(0), [['5','/'], ['1','1']])
+        self.assertEqual(sheet.score(0), 13)
+        self.assertRaises(ValueError, sheet.submit, 1, "X,X")
+        self.assertRaises(ValueError, sheet.submit, 1, ('X','X'))
+        self.assertRaises(ValueError, sheet.submit, 1, ['7','8'])
+        self.assertRaises(ValueError, sheet.submit, 2, "X")
+        for f in range(7):
+            sheet.submit(0, "X")
+        self.assertRaises(ValueError, sheet.submit, 0, "X")
+        self.assertEqual(sheet.submit(0, "X,X,X"), 253)
+        self.assertRaises(ValueError, sheet.submit, 0, "X")
+        self.assertEqual(sheet.frames_completed, 2)
+
+    def test_shared_score_sheet_threads(self):
+        """ Tests frames entered for every player from threads of
+            their own
+        """
+        import threading
+        import tenpin_bench
+        import tenpin_game
+        games = tenpin_bench.random_games(8, 'mixed', seed=3)
+        completed = []
+        sheet = tenpin_game.SharedScoreSheet(['p%d'%i for i in range(8)],
+                        on_all_completed=completed.append)
+        def bowl(player_index):
+            for frame in games[player_index]:
+                sheet.submit(player_index, frame)
+        threads = [threading.Thread(target=bowl, args=(i,))
+                   for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(completed, range(1, 11))
+        self.assertTrue(sheet.game_over)
+        self.assertEqual(sheet.score_sheet(), games)
+        self.assertEqual([sheet.score(i) for i in range(8)],
+                         [calculate_current_score(game) for game in games])
+
+
+class TenpinProjectionUnitTests(unittest.TestCase):
+    """ Tests the final score projections in
+        tenpin_projection.py
+    """
+
+    def test_score_bounds(self):
+        """ Tests the current score and lowest and highest
+            reachable final scores of partial games
+        """
+        import tenpin_projection
+        self.assertEqual(tenpin_projection.score_bounds([]),
+                         (0, 0, 300))
+        self.assertEqual(tenpin_projection.score_bounds(
+                                [['X']]*9), (None, 240, 300))
+        self.assertEqual(tenpin_projection.score_bounds(
+                                [['1','2']]*8), (24, 24, 84))
+        self.assertEqual(tenpin_projection.score_bounds(
+                                [['X']]*8 + [['5','/']]),
+                         (None, 235, 275))
+        alternate_frames = [['X'],['0','0'],['X'],['0','/'],
+                            ['X'],['0','0'],['X'],['0','/'],
+                            ['X'],['0','/','0']]
+        self.assertEqual(tenpin_projection.score_bounds(
+                            alternate_frames), (130, 130, 130))
+
+    def test_score_distribution(self):
+        """ Tests reachable final scores against trying every
+            way the last frame could go
+        """
+        import tenpin_projection
+        frames = [['X']]*8 + [['7','/']]
+        ways = {}
+        for tenth in legal_frames(True):
+            score = calculate_current_score(frames
+                        + [list(parse_frame_score(tenth, True))])
+            ways[score] = ways.get(score, 0) + 1
+        self.assertEqual(tenpin_projection.score_distribution(
+                                                frames), ways)
+        everything = tenpin_projection.score_distribution([])
+        self.assertEqual(sum(everything.values()),
+                         len(legal_frames(False))**9
+                         * len(legal_frames(True)))
+
+
+class TenpinStreamUnitTests(unittest.TestCase):
+    """ Tests throw-by-throw scoring in tenpin_stream.py """
+
+    def test_throw_stream_events(self):
+        """ Tests the events raised as throws come in, and that the
+            last score matches calculate_current_score
+        """
+        import tenpin_stream
+        seen = []
+        stream = tenpin_stream.ThrowStream(seen.append)
+        self.assertEqual(stream.throw(7), [])
+        self.assertEqual(stream.throw(3),
+                         [('frame', 1, ['7','/'])])
+        self.assertEqual(stream.throw(10),
+                         [('bonus', 1, 20), ('frame', 2, ['X'])])
+        self.assertEqual(stream.throw(4), [])
+        self.assertEqual(stream.throw(2),
+                         [('bonus', 2, 16), ('frame', 3, ['4','2']),
+                          ('score', 3, 42)])
+        self.assertEqual(len(seen), 6)
+        frames = [['7','/'],['X'],['4','2'],['0','0'],['X'],
+                  ['X'],['X'],['3','/'],['X'],['X','7','/']]
+        events = list(tenpin_stream.stream_events(
+                        [0,0,10,10,10,3,7,10,10,7,3], stream))
+        self.assertTrue(stream.game_over)
+        self.assertEqual([event.value for event in seen
+                          if event.kind == 'frame'], frames)
+        self.assertEqual(events[-1], ('score', 10,
+                                      calculate_current_score(frames)))
+
+    def test_throw_stream_rejects(self):
+        """ Tests that impossible throws are rejected without
+            changing the game
+        """
+        import tenpin_stream
+        stream = tenpin_stream.ThrowStream()
+        for pins in [-1, 11, '5', 5.0, True, False]:
+            self.assertRaises(ValueError, stream.throw, pins)
+        stream.throw(6L)
+        self.assertRaises(ValueError, stream.throw, 5)
+        self.assertEqual(stream.standing, 4)
+        for pins in [4] + [0]*16 + [10, 3]:
+            stream.throw(pins)
+        #a strike then 3 leaves 7 standing for the last fill ball
+        self.assertRaises(ValueError, stream.throw, 8)
+        stream.throw(7)
+        self.assertTrue(stream.game_over)
+        self.assertRaises(ValueError, stream.throw, 0)
+
+
+class TenpinFuzzUnitTests(unittest.TestCase):
+    """ Tests the differential fuzzer in tenpin_fuzz.py """
+
+    def test_small_sweep(self):
+        """ Tests that a short sweep finds every engine and the
+            validator in agreement with the reference
+        """
+        import tenpin_fuzz
+        counts, failures = tenpin_fuzz.run_sweep(300, 3000, seed=1,
+                                workers=1, chunk_size=100,
+                                exhaustive=False)
+        self.assertEqual(counts, {'games': 300, 'strings': 3000})
+        self.assertEqual(failures, [])
+        kind, count, failures = tenpin_fuzz._check_chunk(('tenth', 'X'))
+        self.assertEqual((count, failures), (3 * 241, []))
+
+    def test_minimize(self):
+        """ Tests that disagreements are shrunk to small reproducers
+        """
+        import tenpin_fuzz
+        def miscounts_spares(frames):
+            score = calculate_current_score(frames)
+            if score is not None and any(frame[-1] == '/'
+                                         for frame in frames):
+                score += 1
+            return score
+        engines = [('broken', miscounts_spares)]
+        game = ([['1','2'],['X'],['3','/'],['4','4']] + [['X']]*5
+                + [['X','X','X']])
+        failures = tenpin_fuzz._game_failures(game, engines)
+        self.assertEqual(failures, ["broken gave 11, reference 10, for "
+                                    + "[['0', '0'], ['0', '0'], "
+                                    + "['3', '/'], ['0', '0']]"])
+        self.assertEqual(tenpin_fuzz.minimize_string("X,5,/",
+                                            lambda string: '/' in string),
+                         "/")
+
+    def test_chunk_stops_early(self):
+        """ Tests that a chunk giving up after too many failures
+            reports only the games it checked
+        """
+        import tenpin_fuzz
+        engines = tenpin_fuzz.ENGINES
+        tenpin_fuzz.ENGINES = [('broken', lambda frames: -1)]
+        try:
+            count, failures = tenpin_fuzz._check_games(1, 100)
+        finally:
+            tenpin_fuzz.ENGINES = engines
+        self.assertEqual(len(failures), tenpin_fuzz.MAX_FAILURES_PER_CHUNK)
+        self.assertEqual(count, tenpin_fuzz.MAX_FAILURES_PER_CHUNK)
+
+    def test_reference_validator(self):
+        """ Tests the reference validator against the table-driven one
+            on every string of up to three characters
+        """
+        import itertools
+        import tenpin_fuzz
+        for length in range(4):
+            for chars in itertools.product('0159X/,', repeat=length):
+                frame = ''.join(chars)
+                for tenth in (False, True):
+                    self.assertEqual(tenpin_fuzz.check_frame_string(frame,
+                                                                    tenth),
+                                     [])
+
+
+class TenpinProfileUnitTests(unittest.TestCase):
+    """ Tests the stage timing in tenpin_profile.py """
+
+    def test_profiler_instrument(self):
+        """ Tests that instrumented functions still work and
+            have their calls counted
+        """
+        import tenpin_profile
+        import types
+        module = types.ModuleType('bowling')
+        module.double = lambda x: 2 * x
+        class Lane(object):
+            def bowl(self, pins):
+                return pins
+        profiler = tenpin_profile.Profiler()
+        profiler.instrument(module, 'double', 'math')
+        profiler.instrument(Lane, 'bowl', 'math')
+        self.assertEqual([module.double(n) for n in range(4)],
+                         [0, 2, 4, 6])
+        self.assertEqual(Lane().bowl(7), 7)
+        stats = profiler.stages['math']
+        self.assertEqual(stats.calls, 5)
+        self.assertEqual(sum(stats.histogram), 5)
+        self.assertTrue(profiler.summary().splitlines()[1]
+                            .startswith('math'))
+
+    def test_stage_names_unique(self):
+        """ Tests that no two timed functions share a stage, so each
+            stage's figures come from one function
+        """
+        import tenpin_profile
+        names = [stage for module, owner, function, stage
+                 in tenpin_profile.STAGES]
+        self.assertEqual(len(set(names)), len(names))
+
+    def test_stage_stats_percentile(self):
+        """ Tests percentiles read from the latency histogram
+        """
+        import tenpin_profile
+        stats = tenpin_profile.StageStats()
+        for seconds in [0.0000005]*98 + [0.003]*2:
+            stats.record(seconds)
+        self.assertEqual(stats.percentile(0.5), 1)
+        self.assertEqual(stats.percentile(0.99), 4096)
+
+
+def main():
+    """ Runs every test, ignoring the command line """
+    unittest.main(module=__name__, argv=[__file__])
+
+
+if __name__ == '__main__':
+    main()